@@ -1,7 +1,9 @@
 import sys
+import threading
 from services.voice_engine import VoiceEngine
 from services.brain_service import BrainService
 from services.director_skill import DirectorSkill # <--- NEW IMPORT
+from services.voice_pipeline import VoicePipeline
 from colorama import Fore, Style, init
 
 init(autoreset=True)
@@ -14,36 +16,48 @@ def main():
     # Initialize Services
     voice = VoiceEngine()
     brain = BrainService()
-    director = DirectorSkill(brain) # <--- NEW INIT (Pass brain to director)
-    
-    print(f"{Fore.GREEN}✅ System Ready. Waiting for input...")
-    
-    while True:
-        # A. Listen
-        user_text = voice.listen(duration=5)
-        
-        if not user_text:
-            continue
-            
+    shutting_down = threading.Event()
+
+    def respond(user_text, cancel):
         # Exit Command
         if "shut down" in user_text.lower():
-            voice.speak("Shutting down systems. Goodbye.")
-            break
-            
+            shutting_down.set()
+            return "Shutting down systems. Goodbye."
+
         # B. Decide Skill (Chat vs Director)
         # Simple keyword detection for now
         trigger_words = ["create", "make", "build", "generate", "render"]
         is_creative_task = any(word in user_text.lower() for word in trigger_words)
-        
+
         if is_creative_task:
             print(f"{Fore.YELLOW}⚙️ Routing to Director Skill...")
-            response = director.create_manifest(user_text)
-        else:
-            print(f"{Fore.YELLOW}🧠 Routing to Chat Core...")
-            response = brain.think(user_text) # Uses default chat prompt
-        
-        # C. Speak Result
-        voice.speak(response)
+            return director.create_manifest(user_text)
+
+        print(f"{Fore.YELLOW}🧠 Routing to Chat Core...")
+        # Streamed: speech starts with the first sentence, and barge-in stops generation
+        return brain.think_stream(user_text, cancel=cancel) # Uses default chat prompt
+
+    # A. Listen / C. Speak run concurrently with B. so the user can interrupt
+    pipeline = VoicePipeline(voice, respond, capture=lambda on_speech_start: voice.listen(
+        duration=5, on_speech_start=on_speech_start))
+
+    # Renders finish in the background; the director speaks up when the final one is ready
+    # (previews just open on screen)
+    def on_render(message, result):
+        if result.final:
+            pipeline.say(message)
+
+    director = DirectorSkill(brain, on_render=on_render)
+    
+    print(f"{Fore.GREEN}✅ System Ready. Waiting for input...")
+    pipeline.start()
+
+    shutting_down.wait()
+    # Let the goodbye finish before the process exits
+    pipeline.wait_idle(timeout=10)
+    pipeline.stop()
+    voice.close()
+    brain.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
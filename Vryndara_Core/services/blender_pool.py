@@ -0,0 +1,170 @@
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from colorama import Fore
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blender_worker.py")
+POOL_SIZE = 2
+STARTUP_TIMEOUT = 120 # Seconds for Blender to boot and report ready
+JOB_TIMEOUT = 600     # A job running longer than this gets its worker restarted
+STDERR_LINES = 50     # Tail of stderr kept for error reports
+MARKER = "@@VRYNDARA@@" # Must match blender_worker.py (it can't import this module)
+
+
+class RenderResult:
+    def __init__(self, job_id, status, error="", elapsed=0.0, stderr="", returncode=None):
+        self.job_id = job_id
+        self.status = status # "ok" or "error"
+        self.error = error
+        self.elapsed = elapsed
+        self.stderr = stderr
+        self.returncode = returncode
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+
+class BlenderWorker:
+    """One long-lived headless Blender process fed job scripts over stdin."""
+
+    def __init__(self, blender_path, name):
+        self.blender_path = blender_path
+        self.name = name
+        self.proc = None
+        self._lines = None
+        self._stderr = deque(maxlen=STDERR_LINES)
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        self._lines = queue.Queue()
+        self._stderr.clear()
+        self.proc = subprocess.Popen(
+            [self.blender_path, "-b", "--factory-startup", "-P", WORKER_SCRIPT],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, bufsize=1, encoding="utf-8", errors="replace"
+        )
+        # Pipes are drained on their own threads so Blender never blocks on output
+        threading.Thread(target=self._pump, args=(self.proc.stdout, self._lines), daemon=True).start()
+        threading.Thread(target=self._pump_stderr, args=(self.proc.stderr,), daemon=True).start()
+        ready = self._next_event(STARTUP_TIMEOUT)
+        if not ready or ready.get("event") != "ready":
+            self.stop()
+            raise RuntimeError(f"Blender worker {self.name} failed to start")
+        print(f"{Fore.GREEN}🎬 Blender worker {self.name} ready.")
+
+    def _pump(self, stream, lines):
+        for line in stream:
+            if line.startswith(MARKER):
+                lines.put(json.loads(line[len(MARKER):]))
+        lines.put(None) # EOF: process exited
+
+    def _pump_stderr(self, stream):
+        for line in stream:
+            self._stderr.append(line.rstrip())
+
+    def _next_event(self, timeout):
+        try:
+            return self._lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def run(self, job_id, script_path, timeout=JOB_TIMEOUT):
+        if not self.alive():
+            self.start()
+        started = time.time()
+        try:
+            self.proc.stdin.write(json.dumps({"job_id": job_id, "script_path": script_path}) + "\n")
+            self.proc.stdin.flush()
+        except OSError as e:
+            self.stop()
+            return RenderResult(job_id, "error", f"Worker pipe closed: {e}", 0.0, self.stderr_tail())
+
+        deadline = started + timeout
+        while True:
+            event = self._next_event(max(0.0, deadline - time.time()))
+            if event is None:
+                # Crash (EOF) or hang (timeout): either way this process is done
+                crashed = not self.alive()
+                returncode = self.proc.poll()
+                stderr = self.stderr_tail()
+                self.stop()
+                reason = f"Blender exited with code {returncode}" if crashed else f"Job exceeded {timeout}s"
+                return RenderResult(job_id, "error", reason, time.time() - started, stderr, returncode)
+            if event.get("event") == "done" and event.get("job_id") == job_id:
+                return RenderResult(
+                    job_id, event["status"], event.get("error", ""), event.get("elapsed", 0.0),
+                    self.stderr_tail() if event["status"] != "ok" else "", 0 if event["status"] == "ok" else 1
+                )
+
+    def stderr_tail(self):
+        return "\n".join(self._stderr)
+
+    def stop(self):
+        if self.proc is None:
+            return
+        try:
+            if self.proc.poll() is None:
+                self.proc.stdin.write(json.dumps({"cmd": "quit"}) + "\n")
+                self.proc.stdin.flush()
+                self.proc.wait(timeout=5)
+        except Exception:
+            self.proc.kill()
+        self.proc = None
+
+
+class BlenderWorkerPool:
+    """
+    Fixed pool of warm Blender workers. Jobs are queued and picked up by
+    whichever worker is free; each submit() returns a Future[RenderResult].
+    """
+
+    def __init__(self, blender_path, size=POOL_SIZE):
+        self.jobs = queue.Queue()
+        self.workers = [BlenderWorker(blender_path, f"#{i + 1}") for i in range(size)]
+        self._closed = False
+        for worker in self.workers:
+            threading.Thread(target=self._serve, args=(worker,), name=f"blender-{worker.name}", daemon=True).start()
+
+    def submit(self, job_id, script_path):
+        future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("Blender pool is shut down"))
+            return future
+        self.jobs.put((job_id, script_path, future))
+        return future
+
+    def pending(self):
+        return self.jobs.qsize()
+
+    def _serve(self, worker):
+        # Boot eagerly so the first job doesn't pay Blender's startup cost
+        try:
+            worker.start()
+        except Exception as e:
+            print(f"{Fore.RED}❌ {e}")
+
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                worker.stop()
+                return
+            job_id, script_path, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(worker.run(job_id, script_path))
+            except Exception as e:
+                future.set_exception(e)
+
+    def shutdown(self):
+        self._closed = True
+        for _ in self.workers:
+            self.jobs.put(None)
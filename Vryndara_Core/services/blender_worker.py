@@ -0,0 +1,47 @@
+# Runs INSIDE Blender: blender -b --factory-startup -P blender_worker.py
+# Stays alive and executes one job script per JSON line on stdin.
+import json
+import sys
+import time
+import traceback
+
+import bpy
+
+MARKER = "@@VRYNDARA@@"
+
+
+def report(data):
+    print(MARKER + json.dumps(data), flush=True)
+
+
+def run_job(job):
+    started = time.time()
+    status, error = "ok", ""
+    try:
+        # Every job starts from a clean scene, like a fresh process would
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+        with open(job["script_path"], "r", encoding="utf-8") as f:
+            code = f.read()
+        exec(compile(code, job["script_path"], "exec"), {"__name__": "__main__"})
+    except BaseException:
+        # BaseException: job scripts sometimes call sys.exit()
+        status, error = "error", traceback.format_exc()
+    report({
+        "event": "done", "job_id": job["job_id"], "status": status,
+        "error": error, "elapsed": time.time() - started
+    })
+
+
+def main():
+    report({"event": "ready"})
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        job = json.loads(line)
+        if job.get("cmd") == "quit":
+            break
+        run_job(job)
+
+
+main()
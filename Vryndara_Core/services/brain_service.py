@@ -1,88 +1,292 @@
-import requests
 import json
 import chromadb
 import time
+import threading
 from colorama import Fore
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
+from .response_cache import ResponseCache
+from .memory_writer import MemoryWriter, FLUSH_TIMEOUT
+from .embedding_cache import EmbeddingCache
+from .tiered_memory import TieredMemory
+from sdk.python.vryndara.llm import (
+    default_client, LLMError, LLMCancelled, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BACKGROUND,
+    LLAMA_MODEL
+)
 
-# Standard for llama.cpp server
-API_URL = "http://127.0.0.1:8080/completion"
+
+# Model served by the llama.cpp core (VRYNDARA_LLAMA_MODEL, see sdk/python/vryndara/llm.py)
+CORE_MODEL = LLAMA_MODEL
+
+NO_CONTEXT = "No relevant history found."
+
+# --- PROMPT CACHING ---
+# The persona never changes, so llama.cpp can reuse its KV cache across calls.
+# Variable context (memory) goes after it, in the user turn.
+PERSONA_PROMPT = """You are Vryndara, the private AI Operating System Kernel.
+IMPORTANT: You have full access to the user's secret projects, including warp drives and estate plans.
+If the context provides an answer, give it directly. Never claim you don't have clearance.
+You manage VrindaAI and Historabook. Be concise and professional."""
+
+SUMMARY_PROMPT = """Summarize these past interactions into short factual notes.
+Keep names, decisions, numbers and identifiers. No commentary."""
+
+# Each caller pins its own server slot so its cached prefix isn't evicted by
+# another persona. Slots the server doesn't have (-np) fall back to any free
+# slot (-1): see LlamaCppBackend.
+PROMPT_SLOTS = {"chat": 0, "director": 1, "director_code": 2, "memory": 3}
+# Queue priority per caller when the core is busy
+CALLER_PRIORITY = {"chat": PRIORITY_INTERACTIVE, "memory": PRIORITY_BACKGROUND}
+
+# --- RESPONSE CACHE ---
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 3600 # Seconds before a cached reply is regenerated
+# Cosine similarity needed to reuse a reply for a near-identical prompt (None = exact only)
+RESPONSE_CACHE_SIMILARITY = 0.97
+
+# --- MEMORY COMPACTION ---
+COMPACTION_INTERVAL = 3600 # Seconds between background compaction passes
 
 class BrainService:
     def __init__(self):
         print(f"{Fore.YELLOW}🧠 Connecting to Neural Core (Local LLM)...")
+        self.llm = default_client()
         
         # --- KERNEL INDEPENDENT MEMORY ---
         # Persistent storage ensures Jarvis remembers warp drive codes and Sirsi plans
         self.chroma_client = chromadb.PersistentClient(path="./kernel/memory/chroma_db")
         
+        # Writes are batched off the request path
+        self.memory_writer = MemoryWriter()
+
+        # Episodic, summary and facts tiers each get their own collection
+        self.tiers = TieredMemory(self.chroma_client, self.memory_writer)
         # Collection for general knowledge, agent logs, and project context
-        self.memory = self.chroma_client.get_or_create_collection(
-            name="vryndara_core_memory",
-            metadata={"hnsw:space": "cosine"} # Semantic similarity for recall
+        self.memory = self.tiers.collections["facts"]
+
+        # Query embeddings are cached; the collection uses the same model for documents
+        self.embedder = EmbeddingCache(embedding_functions.DefaultEmbeddingFunction())
+
+        # --- RESPONSE CACHE ---
+        # Repeated prompts (e.g. "create a monkey") skip the LLM entirely
+        self.response_cache = ResponseCache(
+            max_entries=RESPONSE_CACHE_SIZE,
+            ttl=RESPONSE_CACHE_TTL,
+            embed_fn=self.embedder.embed,
+            similarity_threshold=RESPONSE_CACHE_SIMILARITY
         )
 
+        # Old episodes are folded into summaries in the background
+        self._stop = threading.Event()
+        threading.Thread(target=self._compaction_loop, name="memory-compactor", daemon=True).start()
+
     def store_memory(self, text, metadata):
-        """Saves an event, agent result, or user info into long-term memory."""
-        self.memory.add(
-            documents=[text],
-            metadatas=[metadata],
-            ids=[f"mem_{int(time.time() * 1000)}"]
-        )
+        """Queues an event, agent result, or user info for long-term memory."""
+        self.tiers.add(text, metadata)
+
+    def flush_memory(self, timeout=FLUSH_TIMEOUT):
+        """Waits until every queued memory is searchable."""
+        return self.memory_writer.flush(timeout)
+
+    def close(self):
+        """Flushes pending memories. Call on shutdown."""
+        self._stop.set()
+        self.memory_writer.close()
+
+    def compact_memory(self):
+        """Summarizes old chat and workflow episodes and evicts the raw rows."""
+        return self.tiers.compact(self._summarize)
+
+    def _compaction_loop(self):
+        while not self._stop.wait(COMPACTION_INTERVAL):
+            try:
+                self.compact_memory()
+            except Exception as e:
+                print(f"{Fore.RED}❌ Memory compaction failed: {e}")
+
+    def _summarize(self, documents):
+        """
+        Condenses a group of episodes into one durable summary.
+        Returns None if the core is offline: compaction then keeps the raw
+        episodes and retries them on the next pass.
+        """
+        joined = "\n".join(f"- {doc}" for doc in documents)
+        prompt = self.build_prompt(joined, SUMMARY_PROMPT)
+        summary = self._complete(prompt, n_predict=256, temperature=0.2, caller="memory")
+        if not summary or not summary.strip():
+            return None
+        return f"Summary of {len(documents)} past interactions: {summary}"
+
+    def retrieve_context(self, query, tiers=None, **filters):
+        """
+        Searches memory for relevant context to inject into the LLM prompt.
+        Optional filters: workflow, agent, type, since, until (epoch seconds).
+        """
+        return self.retrieve_contexts([query], tiers=tiers, **filters)[0]
+
+    def retrieve_contexts(self, queries, tiers=None, **filters):
+        """
+        Batch version of retrieve_context: one embedding pass and one Chroma
+        query per tier for all texts. Used by workflows to prefetch context for every step.
+        """
+        if not queries:
+            return []
 
-    def retrieve_context(self, query):
-        """Searches memory for relevant context to inject into the LLM prompt."""
         # Querying the local brain for past engineering or personal data
-        results = self.memory.query(
-            query_texts=[query],
-            n_results=3 # Increased for better contextual depth
+        results = self.tiers.search(
+            queries,
+            self.embedder.embed_many(queries),
+            n_results=3, # Increased for better contextual depth
+            tiers=tiers,
+            **filters
         )
         
-        # Flatten documents list for prompt injection
-        documents = [doc for sublist in results['documents'] for doc in sublist]
-        return " | ".join(documents) if documents else "No relevant history found."
+        # One candidate list per query, flattened for prompt injection
+        contexts = []
+        for candidates in results:
+            documents = [doc for doc, _ in candidates]
+            contexts.append(" | ".join(documents) if documents else NO_CONTEXT)
+        return contexts
 
-    def think(self, user_text, system_prompt=None):
+    def retrieve_workflow_context(self, query, workflow=None, agent=None, facts_context=None):
+        """
+        Context for one workflow step: results of earlier steps in this workflow
+        and of this agent's past runs (episodic, workflow results only, never
+        chat history), followed by durable facts. `facts_context` is a
+        prefetched retrieve_contexts(..., tiers=("facts",)) entry to reuse.
+        """
+        if workflow is not None:
+            # Earlier step results may still be sitting in the write queue
+            self.flush_memory(timeout=5)
+        embedding = self.embedder.embed_many([query])
+        documents = []
+        for scope in ({"workflow": workflow}, {"agent": agent}):
+            if None in scope.values():
+                continue
+            candidates = self.tiers.search([query], embedding, n_results=3, tiers=("episodic",),
+                                           type="workflow_result", **scope)[0]
+            documents.extend(doc for doc, _ in candidates if doc not in documents)
+
+        if facts_context is None:
+            facts_context = self.retrieve_contexts([query], tiers=("facts",))[0]
+        if facts_context != NO_CONTEXT:
+            documents.append(facts_context)
+        return " | ".join(documents) if documents else NO_CONTEXT
+
+    def _generate(self, prompt, n_predict=512, temperature=0.4, caller="chat"):
+        """Sends a pre-formatted prompt to the core. Raises LLMError on failure."""
+        result = self.llm.generate(
+            raw_prompt=prompt,
+            model=CORE_MODEL,
+            priority=CALLER_PRIORITY.get(caller, PRIORITY_NORMAL),
+            max_tokens=n_predict,
+            temperature=temperature,
+            # Reuse the KV cache for the unchanged prompt prefix
+            id_slot=PROMPT_SLOTS.get(caller, -1) # -1 lets the server pick
+        )
+        if result.queue_wait > 1:
+            print(f"{Fore.YELLOW}⏳ Neural Core busy: '{caller}' waited {result.queue_wait:.1f}s in queue.")
+        return result.text
+
+    def _complete(self, prompt, n_predict=512, temperature=0.4, caller="chat"):
+        """Raw completion call. Returns the text, or None if the core is unreachable."""
+        try:
+            return self._generate(prompt, n_predict, temperature, caller)
+        except Exception:
+            return None
+
+    def build_prompt(self, user_text, system_prompt=None, context=None):
+        """
+        Mistral/Llama standard prompt format with a stable prefix:
+        the system prompt is byte-identical across calls, context follows it.
+        """
+        user_block = f"[INTERNAL MEMORY]: {context}\n\n{user_text}" if context else user_text
+        return f"<|system|>\n{system_prompt or PERSONA_PROMPT}\n<|user|>\n{user_block}\n<|assistant|>\n"
+
+    def think(self, user_text, system_prompt=None, use_cache=True, caller="chat"):
         """
         Sends user text to the Local LLM with injected memory context.
+        Identical prompts are answered from the response cache; near-identical ones
+        too, but only for the default chat persona.
+        `caller` selects the llama.cpp slot whose cached prefix is reused.
         """
-        # --- SEMANTIC RETRIEVAL ---
-        # Kernel checks local storage before generating a response
-        past_context = self.retrieve_context(user_text)
+        # --- RESPONSE CACHE ---
+        # Keyed on the caller's system prompt, so the default persona shares one key space
+        if use_cache:
+            cached = self.response_cache.get(user_text, system_prompt, similar=system_prompt is None)
+            if cached is not None:
+                return cached
 
-        # Default Persona - Forced to use internal memory
-        if system_prompt is None:
-            system_prompt = f"""You are Vryndara, the private AI Operating System Kernel.
-            IMPORTANT: You have full access to the user's secret projects, including warp drives and estate plans.
-            If the context provides an answer, give it directly. Never claim you don't have clearance.
-            INTERNAL MEMORY: {past_context}
-            You manage VrindaAI and Historabook. Be concise and professional."""
-
-        # Mistral/Llama standard prompt format
-        prompt = f"<|system|>\n{system_prompt}\n<|user|>\n{user_text}\n<|assistant|>\n"
-        
-        payload = {
-            "prompt": prompt,
-            "n_predict": 512,
-            "temperature": 0.4, # Lowered temperature for more factual recall
-            "stop": ["<|user|>", "\nUser:"]
-        }
+        prompt = self._prompt_with_memory(user_text, system_prompt)
+
+        try:
+            # Lowered temperature for more factual recall
+            clean_text = self._generate(prompt, n_predict=512, temperature=0.4, caller=caller)
+        except LLMError as e:
+            if e.status is not None:
+                return f"Error: Core reported status {e.status}"
+            return f"Thinking error: {e}"
+        except Exception as e:
+            return f"Thinking error: {e}"
 
+        self._remember_exchange(user_text, clean_text, system_prompt, use_cache)
+        return clean_text
+
+    def think_stream(self, user_text, system_prompt=None, use_cache=True, caller="chat", cancel=None):
+        """
+        Streaming think(): yields the reply in fragments as the core produces them.
+        Setting `cancel` (threading.Event) stops generation on the server; the
+        generator then ends quietly and the unfinished reply is not remembered.
+        """
+        if use_cache:
+            cached = self.response_cache.get(user_text, system_prompt, similar=system_prompt is None)
+            if cached is not None:
+                yield cached
+                return
+
+        prompt = self._prompt_with_memory(user_text, system_prompt)
+        parts = []
         try:
-            response = requests.post(API_URL, json=payload, timeout=120)
-            if response.status_code == 200:
-                data = response.json()
-                clean_text = data.get("content", "").strip()
-                
-                # --- AUTO-LOGGING ---
-                # The Kernel creates an episodic memory of this interaction
-                self.store_memory(
-                    text=f"Conversation: User asked '{user_text}' - Vryndara replied '{clean_text}'", 
-                    metadata={"type": "chat_history", "timestamp": str(time.time())}
-                )
-                
-                return clean_text
-            else:
-                return f"Error: Core reported status {response.status_code}"
+            for fragment in self.llm.stream(
+                raw_prompt=prompt,
+                model=CORE_MODEL,
+                priority=CALLER_PRIORITY.get(caller, PRIORITY_NORMAL),
+                max_tokens=512,
+                temperature=0.4,
+                id_slot=PROMPT_SLOTS.get(caller, -1),
+                cancel=cancel
+            ):
+                parts.append(fragment)
+                yield fragment
+        except LLMCancelled:
+            print(f"{Fore.YELLOW}✋ Neural Core: reply cancelled after {len(parts)} fragment(s).")
+            return
+        except LLMError as e:
+            yield f"Error: Core reported status {e.status}" if e.status is not None else f"Thinking error: {e}"
+            return
         except Exception as e:
-            return f"Thinking error: {e}"
\ No newline at end of file
+            yield f"Thinking error: {e}"
+            return
+
+        self._remember_exchange(user_text, "".join(parts).strip(), system_prompt, use_cache)
+
+    def _prompt_with_memory(self, user_text, system_prompt):
+        # --- SEMANTIC RETRIEVAL ---
+        # Only the default persona uses memory; task prompts (Director) bring their own
+        past_context = None
+        if system_prompt is None:
+            past_context = self.retrieve_context(user_text)
+        return self.build_prompt(user_text, system_prompt, past_context)
+
+    def _remember_exchange(self, user_text, reply, system_prompt, use_cache):
+        # --- AUTO-LOGGING ---
+        # The Kernel creates an episodic memory of this interaction
+        self.store_memory(
+            text=f"Conversation: User asked '{user_text}' - Vryndara replied '{reply}'",
+            metadata={"type": "chat_history", "timestamp": str(time.time())}
+        )
+
+        if use_cache and reply:
+            # Near-identical matching is for chat only: Director JSON and scene code
+            # differ by a single entity ("red cube" / "blue cube"), so they match exactly
+            self.response_cache.put(user_text, reply, system_prompt, similar=system_prompt is None)
@@ -1,23 +1,42 @@
 import json
 import os
 import re
-import subprocess
-import time
 from colorama import Fore
+from .blender_pool import BlenderWorkerPool, RenderResult
+from .render_cache import RenderCache
 
 # 🔴 CONFIGURATION 🔴
 # We are BYPASSING the broken C++ engine.
 # We go straight to the source: Blender.
 BLENDER_PATH = r"C:\Program Files\Blender Foundation\Blender 4.3\blender.exe" 
 
+# --- RENDER TIERS ---
+# Rendered in order; earlier tiers are quick previews, the last one is the final image.
+# Jobs may override these via create_manifest(..., tiers=[...]).
+RENDER_TIERS = [
+    {"name": "preview", "width": 480, "height": 270, "samples": 8},
+    {"name": "final", "width": 1920, "height": 1080, "samples": 64},
+]
+
 class DirectorSkill:
-    def __init__(self, brain_service):
+    def __init__(self, brain_service, on_render=None, registry=None):
         self.brain = brain_service
+        # Called as on_render(message, result) when a render finishes or fails
+        self.on_render = on_render
+        # Optional ArtifactRegistry: finished renders are recorded under their job id
+        self.registry = registry
+        self.active_renders = {} # job_id -> Future[RenderResult]
         self.output_folder = "Director_Jobs"
         if not os.path.exists(self.output_folder):
             os.makedirs(self.output_folder)
 
-    def create_manifest(self, user_request):
+        # Finished renders, reused for repeat descriptions or identical scene code
+        self.render_cache = RenderCache(os.path.join(self.output_folder, "render_cache"))
+
+        # Warm headless Blender processes: jobs pay render time, not startup time
+        self.blender_pool = BlenderWorkerPool(BLENDER_PATH) if os.path.exists(BLENDER_PATH) else None
+
+    def create_manifest(self, user_request, tiers=None):
         print(f"{Fore.CYAN}🎬 Director: Analyzing request '{user_request}'...")
         
         system_prompt = r"""You are the 'Director' Agent.
@@ -29,12 +48,28 @@ Schema:
   "engine": "blender"
 }"""
         try:
-            json_text = self.brain.think(user_request, system_prompt=system_prompt)
+            json_text = self.brain.think(user_request, system_prompt=system_prompt, caller="director")
             match = re.search(r'\{.*\}', json_text, re.DOTALL)
             
             if match:
                 raw_data = json.loads(match.group(0))
-                manifest, output_image = self.construct_cpp_manifest(raw_data)
+                description = raw_data.get('description', '')
+                tiers = tiers or RENDER_TIERS
+                final_tier = tiers[-1]
+
+                # --- RENDER CACHE (description) ---
+                cached = self.render_cache.lookup_description(description, final_tier)
+                if cached:
+                    return self._use_cached_render(cached, description)
+
+                manifest = self.construct_cpp_manifest(raw_data, tiers)
+
+                # --- RENDER CACHE (generated scene code) ---
+                script_key = manifest["cache"]["script_key"]
+                cached = self.render_cache.lookup_script(script_key) if script_key else None
+                if cached:
+                    self.render_cache.link_description(description, final_tier, script_key)
+                    return self._use_cached_render(cached, description)
                 
                 # Save Job File
                 job_id = manifest["job_id"]
@@ -46,22 +81,33 @@ Schema:
                 # --- DIRECT OVERRIDE ---
                 # We ignore VrindaAI.exe because it is missing files (blender_master.py).
                 # We launch Blender directly from Python.
-                script_path = manifest["actions"][0]["parameters"]["script_path"]
-                self.launch_blender_directly(script_path)
+                # One action per tier: the preview is queued first so it lands first.
+                final_job = f"{job_id}_{final_tier['name']}"
+                submitted = []
+                for action in manifest["actions"]:
+                    params = action["parameters"]
+                    tier_job = f"{job_id}_{params['tier']['name']}"
+                    future = self.launch_blender_directly(params["script_path"], tier_job)
+                    if future is None:
+                        return "Blender is not available on this machine."
+                    self.active_renders[tier_job] = future
+                    submitted.append((tier_job, params, future))
+
+                # Completion arrives as callbacks; the caller gets control back now.
+                # Attached only after every tier is registered, so a fast preview
+                # can see that its final render is still pending.
+                for tier_job, params, future in submitted:
+                    is_final = tier_job == final_job
+                    future.add_done_callback(
+                        lambda f, tier_job=tier_job, params=params, is_final=is_final: self._on_render_done(
+                            f, tier_job, params["output"], description, params["tier"],
+                            script_key=script_key if is_final else None,
+                            final_job=None if is_final else final_job
+                        )
+                    )
                 # -----------------------
-                
-                # Patience Loop
-                print(f"{Fore.YELLOW}⏳ Waiting for render (up to 60s)...")
-                start_time = time.time()
-                while time.time() - start_time < 60:
-                    if os.path.exists(output_image):
-                        print(f"{Fore.GREEN}✨ Render finished in {int(time.time() - start_time)}s!")
-                        print(f"{Fore.MAGENTA}🖼️  Opening Render: {output_image}")
-                        os.startfile(output_image) 
-                        return f"I have rendered the {raw_data.get('description')}."
-                    time.sleep(1)
-                
-                return "The render timed out. Blender is taking too long."
+
+                return f"Rendering the {description} now. I'll tell you when it's ready."
             else:
                 return "I could not understand the request."
 
@@ -69,44 +115,134 @@ Schema:
             print(f"{Fore.RED}❌ Director Error: {e}")
             return "An error occurred."
 
-    def launch_blender_directly(self, script_path):
+    def _use_cached_render(self, image_path, description):
+        print(f"{Fore.GREEN}♻️ Director: Reusing cached render for '{description}'.")
+        print(f"{Fore.MAGENTA}🖼️  Opening Render: {image_path}")
+        if hasattr(os, "startfile"):
+            os.startfile(image_path)
+        return f"I have rendered the {description}."
+
+    def _on_render_done(self, future, job_id, output_image, description, tier, script_key=None, final_job=None):
+        """Render callback (pool thread). final_job is set for previews of that final render."""
+        self.active_renders.pop(job_id, None)
+        try:
+            result = future.result()
+        except Exception as e:
+            result = RenderResult(job_id, "error", str(e))
+        result.output = output_image
+        result.tier = tier["name"]
+        result.final = final_job is None
+
+        if result.ok and not os.path.exists(output_image):
+            result.status, result.error = "error", "Blender finished without writing the image."
+
+        if not result.final and final_job not in self.active_renders:
+            # A preview that lost the race to its final render is just dropped, file and all
+            try:
+                os.remove(output_image)
+            except OSError:
+                pass
+            return
+
+        if result.ok:
+            self._register_render(result, job_id, description, tier)
+
+        if not result.final:
+            if not result.ok:
+                print(f"{Fore.YELLOW}⚠️ Preview {job_id} failed: {result.error}")
+                return
+            print(f"{Fore.CYAN}👁️ Preview {job_id} ready in {result.elapsed:.1f}s.")
+            print(f"{Fore.MAGENTA}🖼️  Opening Preview: {output_image}")
+            if hasattr(os, "startfile"):
+                os.startfile(output_image)
+            message = f"Here is a quick preview of the {description}."
+        else:
+            if result.ok and script_key:
+                self.render_cache.store(output_image, script_key, description, tier)
+
+            if result.ok:
+                print(f"{Fore.GREEN}✨ Render {job_id} finished in {result.elapsed:.1f}s!")
+                print(f"{Fore.MAGENTA}🖼️  Opening Render: {output_image}")
+                if hasattr(os, "startfile"):
+                    os.startfile(output_image)
+                message = f"I have rendered the {description}."
+            else:
+                print(f"{Fore.RED}❌ Render {job_id} failed: {result.error}")
+                if result.stderr:
+                    print(f"{Fore.RED}{result.stderr}")
+                message = f"The render of the {description} failed."
+
+        if self.on_render:
+            try:
+                self.on_render(message, result)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Render notification failed: {e}")
+
+    def _register_render(self, result, job_id, description, tier):
+        if self.registry is None:
+            return
+        try:
+            base_job = job_id.rsplit("_", 1)[0] # "JOB_1A2B3C4D_preview" -> "JOB_1A2B3C4D"
+            self.registry.register(
+                result.output, "render" if result.final else "render_preview", base_job,
+                source="director", metadata={"description": description, "tier": tier, "elapsed": result.elapsed}
+            )
+        except Exception as e:
+            print(f"{Fore.YELLOW}⚠️ Could not record render {job_id}: {e}")
+
+    def launch_blender_directly(self, script_path, job_id=None):
         """
         Bypasses C++ engine to guarantee execution.
+        Queues the script on the warm Blender pool and returns a Future[RenderResult].
         """
-        if not os.path.exists(BLENDER_PATH):
+        if self.blender_pool is None:
             print(f"{Fore.RED}❌ Error: Blender not found at {BLENDER_PATH}")
-            return
+            return None
 
-        print(f"{Fore.YELLOW}⚙️ Director: Launching Blender Direct Override...")
-        # Command: blender.exe -b -P script.py
-        cmd = [BLENDER_PATH, "-b", "-P", script_path]
-        
-        # Run in background
-        subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        job_id = job_id or os.path.basename(script_path).replace("_script.py", "")
+        print(f"{Fore.YELLOW}⚙️ Director: Queuing {job_id} on Blender pool ({self.blender_pool.pending()} waiting)...")
+        return self.blender_pool.submit(job_id, script_path)
 
-    def construct_cpp_manifest(self, raw_data):
+    def construct_cpp_manifest(self, raw_data, tiers=None):
         import uuid
+        tiers = tiers or RENDER_TIERS
+        final_tier = tiers[-1]
         job_id = f"JOB_{uuid.uuid4().hex[:8].upper()}"
         output_image = os.path.abspath(f"{self.output_folder}/{job_id}_render.png")
-        script_path = os.path.abspath(f"{self.output_folder}/{job_id}_script.py")
-        
-        self.create_blender_script(script_path, raw_data.get("description", ""), output_image)
+
+        # The scene code is generated once and shared by every tier
+        scene_code, is_fallback = self.generate_scene_code(raw_data.get("description", ""))
+
+        actions = []
+        for tier in tiers:
+            is_final = tier is final_tier
+            tier_output = output_image if is_final else os.path.abspath(f"{self.output_folder}/{job_id}_{tier['name']}.png")
+            script_path = os.path.abspath(f"{self.output_folder}/{job_id}_{tier['name']}_script.py")
+            self.create_blender_script(script_path, scene_code, tier_output, tier)
+            actions.append({ "type": "execute_script", "target": "system", "parameters": { "script_path": script_path, "output": tier_output, "tier": dict(tier) } })
+
+        # Fallback monkeys must not be cached under the requested description
+        script_key = None if is_fallback else self.render_cache.script_key(scene_code, final_tier)
 
         manifest = {
             "job_id": job_id,
             "engine": "blender",
-            "header": { "project_name": raw_data.get("project_name", "Untitled"), "scene_name": "Scene_01", "resolution": {"width": 1920, "height": 1080}, "fps": 24 },
+            "header": { "project_name": raw_data.get("project_name", "Untitled"), "scene_name": "Scene_01", "resolution": {"width": final_tier["width"], "height": final_tier["height"]}, "fps": 24 },
             "output": { "path": output_image, "format": "png", "codec": "png", "bitrate": "0" },
+            "render": { "tiers": [dict(t) for t in tiers] },
             "assets": { "characters": [], "environments": [], "props": [], "animations": [] },
-            "actions": [ { "type": "execute_script", "target": "system", "parameters": { "script_path": script_path } } ]
+            "actions": actions,
+            "cache": { "script_key": script_key }
         }
-        return manifest, output_image
+        return manifest
 
-    def create_blender_script(self, path, description, output_path):
+    def generate_scene_code(self, description):
+        """Asks the Brain for scene-building code. Returns (indented code, is_fallback)."""
         print(f"{Fore.CYAN}🧠 Brain: Generating Python code for '{description}'...")
         
-        code_prompt = f"""You are a Blender Python Expert.
-Task: Write code to create: {description}.
+        # Kept free of the description so the prompt prefix stays cacheable
+        code_prompt = """You are a Blender Python Expert.
+Task: Write code to create the object the user describes.
 Rules:
 1. Write raw python code only.
 2. NO conversational text.
@@ -114,7 +250,7 @@ Rules:
 4. Use 'bpy.ops.mesh.primitive_monkey_add()' for monkeys.
 """
         try:
-            raw_code = self.brain.think(f"Code for: {description}", system_prompt=code_prompt)
+            raw_code = self.brain.think(f"Code for: {description}", system_prompt=code_prompt, caller="director_code")
         except:
             raw_code = "ERROR"
 
@@ -122,17 +258,20 @@ Rules:
         bad_keywords = ["HTTPConnectionPool", "timed out", "Thinking error", "Error:"]
         if any(k in raw_code for k in bad_keywords) or len(raw_code) < 10:
             print(f"{Fore.RED}⚠️ Brain Timed Out. Using Fallback.")
-            indented_code = "    bpy.ops.mesh.primitive_monkey_add()"
-        else:
-            clean_code = raw_code.replace("```python", "").replace("```", "").replace("[CODE]", "").replace("[/CODE]", "").strip()
-            indented_code = ""
-            for line in clean_code.splitlines():
-                if "import bpy" not in line:
-                    indented_code += f"    {line}\n"
+            return "    bpy.ops.mesh.primitive_monkey_add()", True
+
+        clean_code = raw_code.replace("```python", "").replace("```", "").replace("[CODE]", "").replace("[/CODE]", "").strip()
+        indented_code = ""
+        for line in clean_code.splitlines():
+            if "import bpy" not in line:
+                indented_code += f"    {line}\n"
 
         if len(indented_code.strip()) == 0:
-             indented_code = "    bpy.ops.mesh.primitive_monkey_add()"
+             return "    bpy.ops.mesh.primitive_monkey_add()", True
+        return indented_code, False
 
+    def create_blender_script(self, path, indented_code, output_path, tier):
+        """Writes a job script that builds the scene and renders it at the tier's quality."""
         # Studio Template
         studio_setup = f"""
 import bpy
@@ -164,14 +303,19 @@ bpy.context.scene.camera = camera
 bpy.ops.object.light_add(type='SUN', location=(5, 5, 10))
 bpy.context.object.data.energy = 5
 
-# 5. Render
+# 5. Render ({tier["name"]} tier)
 scene = bpy.context.scene
 scene.render.image_settings.file_format = 'PNG'
 scene.render.filepath = r"{output_path}"
-scene.render.resolution_x = 1920
-scene.render.resolution_y = 1080
+scene.render.resolution_x = {tier["width"]}
+scene.render.resolution_y = {tier["height"]}
+scene.render.resolution_percentage = 100
+if scene.render.engine == 'CYCLES':
+    scene.cycles.samples = {tier["samples"]}
+else:
+    scene.eevee.taa_render_samples = {tier["samples"]}
 
 bpy.ops.render.render(write_still=True)
 """
         with open(path, "w") as f:
-            f.write(studio_setup)
\ No newline at end of file
+            f.write(studio_setup)
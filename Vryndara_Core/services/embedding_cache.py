@@ -0,0 +1,48 @@
+import threading
+from collections import OrderedDict
+
+from .response_cache import normalize_text
+
+EMBEDDING_CACHE_SIZE = 1024
+
+
+class EmbeddingCache:
+    """
+    LRU cache of query embeddings keyed by normalized text.
+    Misses are embedded together in a single call to the embedding function.
+    """
+
+    def __init__(self, embedding_function, max_entries=EMBEDDING_CACHE_SIZE):
+        self.embedding_function = embedding_function
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def embed(self, text):
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts):
+        keys = [normalize_text(t) for t in texts]
+        results = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    results[key] = self._entries[key]
+                    self.stats["hits"] += 1
+
+        # Unique misses only, preserving order
+        missing = [k for k in dict.fromkeys(keys) if k not in results]
+        if missing:
+            vectors = self.embedding_function(missing)
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    vector = list(vector)
+                    results[key] = vector
+                    self._entries[key] = vector
+                    self.stats["misses"] += 1
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return [results[k] for k in keys]
@@ -0,0 +1,76 @@
+import math
+import re
+import threading
+
+# Words, numbers and identifiers like JOB_1A2B3C4D, wf-1712, sirsi.plan
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9_\-\.]*[a-z0-9]|[a-z0-9]")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "i", "in", "is", "it",
+    "me", "my", "of", "on", "or", "the", "this", "to", "was", "what", "with", "you",
+}
+# Tokens that look like identifiers count for more than plain words
+IDENTIFIER_BOOST = 2.0
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def is_identifier(token):
+    return any(c.isdigit() for c in token) or "_" in token or "-" in token
+
+
+class KeywordIndex:
+    """
+    Lightweight in-memory inverted index over memory documents.
+    Complements vector search, which is poor at exact identifiers.
+    Only postings live in RAM; document text and metadata stay in Chroma
+    and are fetched by id for the final candidates.
+    """
+
+    def __init__(self):
+        self._postings = {}  # token -> {doc_id: term frequency}
+        self._ids = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, doc_id, text):
+        tokens = tokenize(text)
+        with self._lock:
+            if doc_id in self._ids:
+                return
+            self._ids.add(doc_id)
+            for token in tokens:
+                postings = self._postings.setdefault(token, {})
+                postings[doc_id] = postings.get(doc_id, 0) + 1
+
+    def remove(self, docs):
+        """`docs` is an iterable of (doc_id, text): the text names the postings to clear."""
+        with self._lock:
+            for doc_id, text in docs:
+                if doc_id not in self._ids:
+                    continue
+                self._ids.discard(doc_id)
+                for token in set(tokenize(text)):
+                    postings = self._postings.get(token)
+                    if postings is not None:
+                        postings.pop(doc_id, None)
+                        if not postings:
+                            del self._postings[token]
+
+    def search(self, query, limit=10):
+        """Returns up to `limit` (doc_id, score), best first."""
+        scores = {}
+        with self._lock:
+            total = len(self._ids) or 1
+            for token in set(tokenize(query)):
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                weight = idf * (IDENTIFIER_BOOST if is_identifier(token) else 1.0)
+                for doc_id, tf in postings.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * (1 + math.log(tf))
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit]
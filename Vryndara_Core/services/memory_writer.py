@@ -0,0 +1,107 @@
+import atexit
+import itertools
+import queue
+import threading
+import time
+from colorama import Fore
+
+# Flush when this many documents are waiting...
+BATCH_SIZE = 32
+# ...or when the oldest pending document is this old (seconds)
+FLUSH_INTERVAL = 0.5
+# Longest flush() waits for the writer by default (seconds)
+FLUSH_TIMEOUT = 30
+
+_STOP = object()
+
+
+class MemoryWriter:
+    """
+    Background writer for ChromaDB.
+    Documents are queued by the caller and added in batches on a daemon thread,
+    so embedding and HNSW inserts never run on the request path.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._ids = itertools.count()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self._thread.start()
+        # Daemon threads die with the interpreter; make sure nothing queued is lost
+        atexit.register(self.close)
+
+    def new_id(self):
+        """Millisecond timestamps alone collide when several writes land together."""
+        return f"mem_{int(time.time() * 1000)}_{next(self._ids)}"
+
+    def enqueue(self, collection, text, metadata, doc_id=None):
+        if self._closed:
+            # Late writes after shutdown go straight through
+            collection.add(documents=[text], metadatas=[metadata], ids=[doc_id or self.new_id()])
+            return
+        self._queue.put((collection, text, metadata, doc_id or self.new_id()))
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """
+        Blocks until everything enqueued so far has been written, or timeout.
+        Returns at once after close(): nothing is left to wait for.
+        """
+        if self._closed or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or item is _STOP or isinstance(item, threading.Event):
+                self._write(pending)
+                pending, deadline = [], None
+                if isinstance(item, threading.Event):
+                    item.set()
+                if item is _STOP:
+                    return
+                continue
+
+            pending.append(item)
+            if deadline is None:
+                deadline = time.time() + self.flush_interval
+            if len(pending) >= self.batch_size:
+                self._write(pending)
+                pending, deadline = [], None
+
+    def _write(self, items):
+        """One add() call per collection for the whole batch."""
+        if not items:
+            return
+        batches = {}
+        for collection, text, metadata, doc_id in items:
+            batch = batches.setdefault(id(collection), (collection, [], [], []))
+            batch[1].append(text)
+            batch[2].append(metadata)
+            batch[3].append(doc_id)
+
+        for collection, documents, metadatas, ids in batches.values():
+            try:
+                collection.add(documents=documents, metadatas=metadatas, ids=ids)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Memory write failed ({len(documents)} docs): {e}")
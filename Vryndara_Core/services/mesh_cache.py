@@ -0,0 +1,208 @@
+import copy
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from colorama import Fore
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+from .render_cache import content_key
+
+# Absolute, so the kernel and the gateway land on the same folder whatever their cwd
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MESH_CACHE_DIR = os.path.join(PROJECT_ROOT, "engineering_output", "mesh_cache")
+MESH_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024 # Least recently used meshes go first
+MESH_EXTENSIONS = (".stl", ".obj", ".ply", ".glb")
+
+
+def mesh_files(value, found=None):
+    """Paths of existing mesh files anywhere in a (nested) result."""
+    found = [] if found is None else found
+    if isinstance(value, dict):
+        for v in value.values():
+            mesh_files(v, found)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            mesh_files(v, found)
+    elif isinstance(value, str) and value.lower().endswith(MESH_EXTENSIONS) and os.path.isfile(value):
+        found.append(value)
+    return found
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock shared by every process using the cache (kernel, gateway)."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError: # LK_LOCK gives up after ~10s; keep waiting
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _replace_paths(value, mapping):
+    if isinstance(value, dict):
+        return {k: _replace_paths(v, mapping) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_paths(v, mapping) for v in value]
+    if isinstance(value, str):
+        return mapping.get(value, value)
+    return value
+
+
+class MeshCache:
+    """
+    Content-addressed cache of SDF meshing results, keyed by the exact code and
+    sampling parameters. Mesh files are copied in and the result is stored with
+    its paths pointing at the copies. The kernel and the gateway share one
+    directory: every index read-modify-write happens under a lock file, on
+    the index as it is on disk, so neither process loses the other's entries.
+    """
+
+    def __init__(self, root=MESH_CACHE_DIR, max_bytes=MESH_CACHE_MAX_BYTES, registry=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        # Optional ArtifactRegistry: rows for evicted files stop pointing at them
+        self.registry = registry
+        self.index_path = os.path.join(root, "index.json")
+        self.lock_path = os.path.join(root, "index.lock")
+        self._lock = threading.Lock()
+        self._building = {} # key -> Event, so concurrent identical jobs mesh once
+        self._building_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """Thread and process exclusive access; yields the current on-disk index."""
+        with self._lock, _file_lock(self.lock_path):
+            yield self._load()
+
+    def _exists(self, entry):
+        return all(os.path.exists(os.path.join(self.root, name)) for name in entry["files"])
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {k: e for k, e in index.items() if self._exists(e)}
+
+    def _save(self, index):
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def key(self, code, params):
+        return content_key("mesh", code.strip(), params)
+
+    def lookup(self, key):
+        with self._locked() as index:
+            entry = index.get(key)
+            if entry is None or not self._exists(entry):
+                return None
+            # Most recently used, so the other process won't evict it next
+            entry["last_used"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+            self._save(index)
+            return copy.deepcopy(entry["result"])
+
+    def store(self, key, result, description=""):
+        files = mesh_files(result)
+        mapping, names = {}, []
+        for i, path in enumerate(files):
+            name = f"{key}_{i}{os.path.splitext(path)[1].lower()}"
+            shutil.copyfile(path, os.path.join(self.root, name))
+            mapping[path] = os.path.abspath(os.path.join(self.root, name))
+            names.append(name)
+        cached = _replace_paths(result, mapping)
+        with self._locked() as index:
+            index[key] = {
+                "files": names,
+                "size": sum(os.path.getsize(os.path.join(self.root, n)) for n in names),
+                "description": description[:200],
+                "result": cached,
+                "created": time.time(),
+                "last_used": time.time(),
+                "hits": 0,
+            }
+            self._evict(index)
+            self._save(index)
+        return copy.deepcopy(cached)
+
+    def _evict(self, index):
+        total = sum(e["size"] for e in index.values())
+        for key in sorted(index, key=lambda k: index[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            entry = index.pop(key)
+            total -= entry["size"]
+            for name in entry["files"]:
+                path = os.path.join(self.root, name)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                if self.registry is not None:
+                    try:
+                        self.registry.forget_path(path)
+                    except Exception as e:
+                        print(f"{Fore.YELLOW}⚠️ Could not update artifact registry for {name}: {e}")
+            print(f"{Fore.YELLOW}🗑️ Mesh cache: evicted {entry['description'][:60] or key[:12]}")
+
+    def generate(self, engineer, code, description="", **params):
+        """
+        engineer.generate_sdf_from_code(code, **params), served from the cache
+        when this exact code and parameters were meshed before.
+        """
+        # The service's own sampling settings are part of the key too
+        key_params = dict(params, resolution=getattr(engineer, "resolution", None))
+        key = self.key(code, key_params)
+
+        while True:
+            cached = self.lookup(key)
+            if cached is not None:
+                self.hits += 1
+                print(f"{Fore.GREEN}♻️ Mesh cache hit: {description[:60] or key[:12]}")
+                if isinstance(cached, dict):
+                    cached["cached"] = True
+                return cached
+            with self._building_lock:
+                building = self._building.get(key)
+                if building is None:
+                    self._building[key] = threading.Event()
+                    break
+            building.wait() # Same code already meshing in this process: reuse its result
+
+        self.misses += 1
+        try:
+            result = engineer.generate_sdf_from_code(code, **params)
+            if not isinstance(result, dict) or result.get("status") == "error" or result.get("error"):
+                return result # Failures are never cached
+            return self.store(key, result, description)
+        finally:
+            with self._building_lock:
+                self._building.pop(key).set()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from colorama import Fore
+
+from .response_cache import normalize_text
+
+RENDER_CACHE_MAX_BYTES = 512 * 1024 * 1024 # Oldest-used renders are evicted past this
+
+
+def content_key(*parts):
+    """Stable SHA-256 over JSON-serializable parts (dicts are key-sorted)."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Content-addressed store of finished Director renders.
+    Entries are keyed by the generated scene code + render settings; a second
+    index maps normalized descriptions to those entries so a repeat request
+    can skip both the LLM and Blender.
+    """
+
+    def __init__(self, root, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._index = self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("entries", {})
+        index.setdefault("descriptions", {})
+        # Drop entries whose file vanished
+        for key in [k for k, e in index["entries"].items() if not os.path.exists(os.path.join(self.root, e["file"]))]:
+            del index["entries"][key]
+        return index
+
+    def _save(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    # --- KEYS ---
+    def description_key(self, description, settings):
+        return content_key("description", normalize_text(description), settings)
+
+    def script_key(self, code, settings):
+        return content_key("script", code.strip(), settings)
+
+    # --- LOOKUPS ---
+    def _touch(self, key):
+        entry = self._index["entries"].get(key)
+        if entry is None:
+            return None
+        path = os.path.join(self.root, entry["file"])
+        if not os.path.exists(path):
+            del self._index["entries"][key]
+            return None
+        entry["last_used"] = time.time()
+        entry["hits"] = entry.get("hits", 0) + 1
+        self._save()
+        return path
+
+    def lookup_description(self, description, settings):
+        with self._lock:
+            key = self._index["descriptions"].get(self.description_key(description, settings))
+            return self._touch(key) if key else None
+
+    def lookup_script(self, script_key):
+        with self._lock:
+            return self._touch(script_key)
+
+    def link_description(self, description, settings, script_key):
+        """Records that this description produced this script (after a script-level hit)."""
+        with self._lock:
+            if script_key in self._index["entries"]:
+                self._index["descriptions"][self.description_key(description, settings)] = script_key
+                self._save()
+
+    # --- STORE ---
+    def store(self, image_path, script_key, description, settings):
+        """Copies a finished render into the cache and returns the cached path."""
+        if not os.path.exists(image_path):
+            return None
+        filename = f"{script_key}{os.path.splitext(image_path)[1] or '.png'}"
+        cached_path = os.path.join(self.root, filename)
+        with self._lock:
+            shutil.copyfile(image_path, cached_path)
+            self._index["entries"][script_key] = {
+                "file": filename,
+                "size": os.path.getsize(cached_path),
+                "description": description,
+                "created": time.time(),
+                "last_used": time.time(),
+                "hits": 0,
+            }
+            self._index["descriptions"][self.description_key(description, settings)] = script_key
+            self._evict()
+            self._save()
+        return cached_path
+
+    def _evict(self):
+        entries = self._index["entries"]
+        total = sum(e["size"] for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            entry = entries.pop(key)
+            total -= entry["size"]
+            try:
+                os.remove(os.path.join(self.root, entry["file"]))
+            except OSError:
+                pass
+            print(f"{Fore.YELLOW}🗑️ Render cache: evicted {entry['description']}")
+        # Forget descriptions pointing at evicted entries
+        descriptions = self._index["descriptions"]
+        for desc_key in [d for d, k in descriptions.items() if k not in entries]:
+            del descriptions[desc_key]
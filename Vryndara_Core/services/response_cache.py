@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_text(text):
+    """Lowercases and collapses whitespace so trivially different prompts share a key."""
+    return " ".join(str(text).lower().split())
+
+
+class ResponseCache:
+    """
+    LRU response cache for the Neural Core.
+    Exact hits are keyed by (system prompt, user text). If an embedding function
+    and a similarity threshold are given, near-identical user texts under the
+    same system prompt are also served from cache, unless the caller opts out
+    with similar=False (structured output, where one word changes the answer).
+    """
+
+    def __init__(self, max_entries=256, ttl=3600, embed_fn=None, similarity_threshold=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+
+        self._entries = OrderedDict()  # key -> (response, created_at, embedding)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0}
+
+    def _key(self, system_prompt, user_text):
+        return (normalize_text(system_prompt or ""), normalize_text(user_text))
+
+    def _expired(self, created_at):
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _embed(self, user_text):
+        if self.embed_fn is None or self.similarity_threshold is None:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(normalize_text(user_text)), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else None
+        except Exception:
+            return None
+
+    def get(self, user_text, system_prompt=None, similar=True):
+        """Returns a cached response or None. similar=False restricts the lookup to exact hits."""
+        key = self._key(system_prompt, user_text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry[1]):
+                    del self._entries[key]
+                    self.stats["evictions"] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[0]
+
+        # --- SIMILARITY LOOKUP ---
+        # Only compared against entries sharing the same system prompt
+        query_vec = self._embed(user_text) if similar else None
+        if query_vec is not None:
+            with self._lock:
+                best_key, best_score = None, self.similarity_threshold
+                for other_key, (_, created_at, vec) in self._entries.items():
+                    if other_key[0] != key[0] or vec is None or self._expired(created_at):
+                        continue
+                    score = float(np.dot(query_vec, vec))
+                    if score >= best_score:
+                        best_key, best_score = other_key, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.stats["similar_hits"] += 1
+                    return self._entries[best_key][0]
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, user_text, response, system_prompt=None, similar=True):
+        key = self._key(system_prompt, user_text)
+        # Entries stored without a vector only ever serve exact hits
+        vector = self._embed(user_text) if similar else None
+        with self._lock:
+            self._entries[key] = (response, time.time(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def hit_rate(self):
+        with self._lock:
+            hits = self.stats["hits"] + self.stats["similar_hits"]
+            total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def snapshot(self):
+        """Returns current counters for logging and dashboards."""
+        with self._lock:
+            data = dict(self.stats)
+            data["size"] = len(self._entries)
+        data["hit_rate"] = round(self.hit_rate(), 3)
+        return data
@@ -0,0 +1,253 @@
+import time
+from colorama import Fore
+from .keyword_index import KeywordIndex
+
+# --- MEMORY TIERS ---
+# Durable facts keep the original collection name so existing knowledge survives
+TIER_COLLECTIONS = {
+    "episodic": "vryndara_episodic_memory", # Raw chat turns and workflow results
+    "summary": "vryndara_summary_memory",   # Compacted episodes
+    "facts": "vryndara_core_memory",        # Agent logs, project context, user info
+}
+EPISODIC_TYPES = {"chat_history", "workflow_result"}
+
+# --- COMPACTION ---
+EPISODIC_RETENTION = 3 * 24 * 3600 # Raw episodes older than this get summarized
+MAX_EPISODIC_ENTRIES = 2000         # Hard cap; the oldest overflow is summarized early
+COMPACTION_GROUP_SIZE = 20          # Episodes merged into one summary
+
+# --- HYBRID RETRIEVAL ---
+CANDIDATE_POOL = 10 # Candidates pulled from each retriever before reranking
+KEYWORD_OVERFETCH = 4 # Keyword hits fetched per candidate slot, since filters apply after the fetch
+REBUILD_PAGE = 1000   # Documents read per page when rebuilding the keyword index
+RRF_K = 60          # Reciprocal rank fusion damping constant
+
+
+def memory_time(metadata):
+    """Numeric timestamp of a row; older rows only carry the string 'timestamp'."""
+    for key in ("ts", "timestamp"):
+        try:
+            return float(metadata[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 0.0
+
+
+def build_where(workflow=None, agent=None, type=None, since=None, until=None):
+    """Translates retrieval filters into a Chroma `where` clause (None if unfiltered)."""
+    clauses = []
+    for key, value in (("workflow", workflow), ("agent", agent), ("type", type)):
+        if value is not None:
+            clauses.append({key: value})
+    if since is not None:
+        clauses.append({"ts": {"$gte": float(since)}})
+    if until is not None:
+        clauses.append({"ts": {"$lte": float(until)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def metadata_filter(workflow=None, agent=None, type=None, since=None, until=None):
+    """Same filters as build_where, as a Python predicate for the keyword index."""
+    def accept(metadata):
+        for key, value in (("workflow", workflow), ("agent", agent), ("type", type)):
+            if value is not None and metadata.get(key) != value:
+                return False
+        ts = memory_time(metadata)
+        if since is not None and ts < since:
+            return False
+        if until is not None and ts > until:
+            return False
+        return True
+    return accept
+
+
+class TieredMemory:
+    """
+    Long-term memory split across one Chroma collection per tier.
+    Keeping episodic chatter out of the facts collection keeps every
+    HNSW index (and the context it returns) small.
+    """
+
+    def __init__(self, chroma_client, writer):
+        self.writer = writer
+        self.collections = {
+            tier: chroma_client.get_or_create_collection(
+                name=name,
+                metadata={"hnsw:space": "cosine"} # Semantic similarity for recall
+            )
+            for tier, name in TIER_COLLECTIONS.items()
+        }
+
+        # Exact-identifier lookups; postings rebuilt from the collections on startup
+        self.keywords = KeywordIndex()
+        for collection in self.collections.values():
+            offset = 0
+            while True:
+                data = collection.get(include=["documents"], limit=REBUILD_PAGE, offset=offset)
+                for doc_id, doc in zip(data['ids'], data['documents']):
+                    self.keywords.add(doc_id, doc)
+                if len(data['ids']) < REBUILD_PAGE:
+                    break
+                offset += REBUILD_PAGE
+
+    def tier_for(self, metadata):
+        if metadata.get("tier") in self.collections:
+            return metadata["tier"]
+        if metadata.get("type") in EPISODIC_TYPES:
+            return "episodic"
+        if metadata.get("type") == "summary":
+            return "summary"
+        return "facts"
+
+    def add(self, text, metadata):
+        metadata = dict(metadata)
+        metadata.setdefault("ts", time.time())
+        metadata["tier"] = self.tier_for(metadata)
+        doc_id = self.writer.new_id()
+        self.writer.enqueue(self.collections[metadata["tier"]], text, metadata, doc_id)
+        self.keywords.add(doc_id, text)
+
+    def query(self, query_embeddings, n_results=3, tiers=None, where=None):
+        """
+        Queries each tier (pre-filtered by `where`) and merges candidates by distance.
+        Returns one list of (id, document, metadata, distance) per query embedding.
+        """
+        merged = [[] for _ in query_embeddings]
+        for tier in tiers or self.collections:
+            collection = self.collections[tier]
+            count = collection.count()
+            if count == 0:
+                continue
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=min(n_results, count),
+                where=where,
+                include=["documents", "metadatas", "distances"]
+            )
+            for i in range(len(query_embeddings)):
+                merged[i].extend(zip(
+                    results['ids'][i], results['documents'][i],
+                    results['metadatas'][i], results['distances'][i]
+                ))
+
+        return [sorted(candidates, key=lambda c: c[3])[:n_results] for candidates in merged]
+
+    def fetch(self, doc_ids, tiers=None):
+        """Document text and metadata by id: {doc_id: (document, metadata)}."""
+        found = {}
+        for tier in tiers or self.collections:
+            missing = [doc_id for doc_id in doc_ids if doc_id not in found]
+            if not missing:
+                break
+            data = self.collections[tier].get(ids=missing, include=["documents", "metadatas"])
+            for doc_id, doc, meta in zip(data['ids'], data['documents'], data['metadatas']):
+                found[doc_id] = (doc, meta or {})
+        return found
+
+    def keyword_search(self, query, n_results, accept=None):
+        """Keyword hits that pass `accept`, as (doc_id, document, metadata), best first."""
+        hits = self.keywords.search(query, n_results * KEYWORD_OVERFETCH)
+        # Tier filtering is left to `accept`: legacy chat rows sit in the facts collection
+        docs = self.fetch([doc_id for doc_id, _ in hits])
+        ranked = []
+        for doc_id, _ in hits:
+            if doc_id not in docs: # Not written yet, or already compacted away
+                continue
+            doc, meta = docs[doc_id]
+            if accept is None or accept(meta):
+                ranked.append((doc_id, doc, meta))
+                if len(ranked) >= n_results:
+                    break
+        return ranked
+
+    def search(self, queries, query_embeddings, n_results=3, tiers=None, **filters):
+        """
+        Hybrid retrieval: filtered vector search plus keyword lookup,
+        merged with reciprocal rank fusion.
+        Returns one list of (document, metadata) per query, best first.
+        """
+        vector_hits = self.query(query_embeddings, CANDIDATE_POOL, tiers, build_where(**filters))
+        accept = metadata_filter(**filters)
+        if tiers:
+            base_accept = accept
+            # Legacy rows have no tier tag; derive it the same way writes do
+            accept = lambda meta: self.tier_for(meta) in tiers and base_accept(meta)
+
+        ranked = []
+        for query, candidates in zip(queries, vector_hits):
+            scores, docs = {}, {}
+            candidates = [c for c in candidates if accept(c[2] or {})]
+            for rank, (doc_id, doc, meta, _) in enumerate(candidates):
+                scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank)
+                docs[doc_id] = (doc, meta)
+            for rank, (doc_id, doc, meta) in enumerate(self.keyword_search(query, CANDIDATE_POOL, accept)):
+                scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank)
+                docs[doc_id] = (doc, meta)
+
+            best = sorted(scores, key=scores.get, reverse=True)[:n_results]
+            ranked.append([docs[doc_id] for doc_id in best])
+        return ranked
+
+    # --- COMPACTION ---
+    def _episodes(self):
+        """All raw episodes, including legacy chat rows stored with the facts."""
+        rows = []
+        sources = [
+            (self.collections["episodic"], None),
+            (self.collections["facts"], {"type": "chat_history"}),
+        ]
+        for collection, where in sources:
+            data = collection.get(where=where, include=["documents", "metadatas"])
+            for doc_id, doc, meta in zip(data['ids'], data['documents'], data['metadatas']):
+                rows.append((collection, doc_id, doc, meta or {}))
+        rows.sort(key=lambda r: memory_time(r[3]))
+        return rows
+
+    def compact(self, summarize, retention=EPISODIC_RETENTION, max_entries=MAX_EPISODIC_ENTRIES,
+                group_size=COMPACTION_GROUP_SIZE):
+        """
+        Merges old episodes into summary rows and deletes the raw rows.
+        `summarize` takes a list of documents and returns one string, or None
+        (e.g. LLM offline) to leave that group untouched for a later pass.
+        Returns the number of episodes compacted.
+        """
+        self.writer.flush()
+        rows = self._episodes()
+        cutoff = time.time() - retention
+        overflow = max(0, len(rows) - max_entries)
+        stale = [r for i, r in enumerate(rows) if i < overflow or memory_time(r[3]) < cutoff]
+        if not stale:
+            return 0
+
+        compacted = 0
+        for start in range(0, len(stale), group_size):
+            group = stale[start:start + group_size]
+            summary = summarize([doc for _, _, doc, _ in group])
+            if not summary:
+                continue
+
+            # Summary is written synchronously before the raw rows go away
+            summary_id = self.writer.new_id()
+            summary_meta = {
+                "type": "summary",
+                "tier": "summary",
+                "ts": memory_time(group[-1][3]),
+                "span_start": memory_time(group[0][3]),
+                "span_end": memory_time(group[-1][3]),
+                "source_count": len(group),
+            }
+            self.collections["summary"].add(documents=[summary], metadatas=[summary_meta], ids=[summary_id])
+            self.keywords.add(summary_id, summary)
+
+            by_collection = {}
+            for collection, doc_id, _, _ in group:
+                by_collection.setdefault(id(collection), (collection, []))[1].append(doc_id)
+            for collection, ids in by_collection.values():
+                collection.delete(ids=ids)
+            self.keywords.remove((doc_id, doc) for _, doc_id, doc, _ in group)
+            compacted += len(group)
+
+        print(f"{Fore.CYAN}🗜️ Memory: compacted {compacted} episodes into summaries.")
+        return compacted
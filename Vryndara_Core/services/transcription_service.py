@@ -0,0 +1,157 @@
+import io
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from colorama import Fore
+
+MODEL_PATH = os.path.join("models", "faster-whisper-small")
+WORKERS = int(os.environ.get("VRYNDARA_WHISPER_WORKERS", "2"))
+BATCH_SIZE = 8        # Segments handed to one worker per round trip
+BATCH_WINDOW = 0.05   # Seconds to wait for more segments once a worker is free
+
+# --- WORKER PROCESS SIDE ---
+_model = None
+
+
+def _load_model(model_path, device, compute_type, cpu_threads):
+    """Pool initializer: each worker process loads Whisper once and keeps it warm."""
+    global _model
+    from faster_whisper import WhisperModel
+    _model = WhisperModel(model_path, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_batch(jobs):
+    """Runs a batch of (audio, options) back to back on the resident model."""
+    results = []
+    for audio, options in jobs:
+        try:
+            if isinstance(audio, (bytes, bytearray)):
+                # Encoded audio (wav, mp3, webm...) is decoded by faster-whisper itself
+                audio = io.BytesIO(audio)
+            segments, _ = _model.transcribe(audio, **options)
+            results.append((True, " ".join(segment.text for segment in segments).strip()))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+
+# --- SERVICE SIDE ---
+class TranscriptionService:
+    """
+    Speech-to-text for the whole kernel: the mic loop, gateway uploads and agents
+    all submit here. Whisper runs in a pool of worker processes (off the event
+    loop's GIL); queued segments are grouped into batches per worker round trip.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, workers=WORKERS, device=None, compute_type="int8"):
+        device = device or ("cuda" if os.environ.get("USE_GPU") == "true" else "cpu")
+        self.workers = max(1, workers)
+        self.available = os.path.exists(model_path)
+        self._jobs = queue.Queue()
+        self._free = threading.Semaphore(self.workers)
+        self._closed = False
+        self.stats = {"jobs": 0, "batches": 0, "errors": 0}
+
+        if not self.available:
+            print(f"{Fore.RED}❌ Error: Whisper model not found at {model_path}")
+            self._pool = None
+            return
+
+        cpu_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._init_args = (model_path, device, compute_type, cpu_threads)
+        self._pool = self._start_pool()
+        threading.Thread(target=self._dispatch, name="whisper-dispatch", daemon=True).start()
+        print(f"{Fore.GREEN}✅ Transcription service: {self.workers} Whisper worker(s) on {device}.")
+
+    def _start_pool(self):
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_load_model, initargs=self._init_args)
+        # Start every worker now so the first request doesn't pay the model load
+        for _ in range(self.workers):
+            pool.submit(_transcribe_batch, [])
+        return pool
+
+    def submit(self, audio, initial_prompt=None, beam_size=5, **options):
+        """
+        Queues audio for transcription and returns a Future[str].
+        audio: float32 mono samples at 16 kHz, or encoded bytes in any format.
+        """
+        future = Future()
+        if self._pool is None or self._closed:
+            future.set_exception(RuntimeError("Transcription service is not available"))
+            return future
+        options.update(beam_size=beam_size, initial_prompt=initial_prompt)
+        self._jobs.put((audio, options, future))
+        return future
+
+    def transcribe(self, audio, timeout=None, **options):
+        return self.submit(audio, **options).result(timeout)
+
+    def pending(self):
+        return self._jobs.qsize()
+
+    def _next_batch(self):
+        batch = [self._jobs.get()]
+        while len(batch) < BATCH_SIZE and batch[-1] is not None:
+            try:
+                batch.append(self._jobs.get(timeout=BATCH_WINDOW))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self):
+        while True:
+            # Only form a batch once a worker can take it; meanwhile jobs pile up
+            self._free.acquire()
+            batch = self._next_batch()
+            closing = batch[-1] is None
+            batch = [job for job in batch if job is not None and job[2].set_running_or_notify_cancel()]
+            if batch:
+                self.stats["batches"] += 1
+                self.stats["jobs"] += len(batch)
+                try:
+                    pool = self._pool
+                    result = pool.submit(_transcribe_batch, [(audio, options) for audio, options, _ in batch])
+                    result.add_done_callback(lambda f, batch=batch, pool=pool: self._resolve(f, batch, pool))
+                except Exception as e:
+                    self._resolve_error(batch, e)
+            else:
+                self._free.release()
+            if closing:
+                return
+
+    def _resolve(self, result, batch, pool):
+        self._free.release()
+        try:
+            outcomes = result.result()
+        except Exception as e:
+            # The worker process died or the batch couldn't be sent
+            if isinstance(e, BrokenProcessPool) and pool is self._pool and not self._closed:
+                print(f"{Fore.YELLOW}⚠️ Whisper worker crashed; restarting the pool.")
+                self._pool = self._start_pool()
+                # Reap the dead pool's processes and management thread (this runs on it: no wait)
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._resolve_error(batch, e, release=False)
+            return
+        for (_, _, future), (ok, value) in zip(batch, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                self.stats["errors"] += 1
+                future.set_exception(RuntimeError(value))
+
+    def _resolve_error(self, batch, error, release=True):
+        if release:
+            self._free.release()
+        self.stats["errors"] += len(batch)
+        for _, _, future in batch:
+            future.set_exception(error)
+
+    def shutdown(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._jobs.put(None)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,138 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from colorama import Fore
+
+from .render_cache import content_key
+
+TTS_CACHE_DIR = os.path.join("models", "tts_cache")
+TTS_CACHE_MAX_BYTES = 256 * 1024 * 1024 # On disk; least recently used phrases go first
+TTS_MEMORY_MAX_BYTES = 32 * 1024 * 1024 # Hot phrases kept in RAM
+
+
+class TTSCache:
+    """
+    Synthesized PCM per (sentence, voice model). A small in-memory LRU sits in
+    front of a size-bounded directory of .pcm files with an index.json.
+    """
+
+    def __init__(self, root=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES, memory_bytes=TTS_MEMORY_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.index_path = os.path.join(root, "index.json")
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False # Last-used times changed since the index was written
+        os.makedirs(root, exist_ok=True)
+        self._index = self._load()
+        # Hits only touch the in-memory index; keep the LRU order across restarts
+        atexit.register(self.flush)
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        return {k: e for k, e in index.items() if os.path.exists(os.path.join(self.root, e["file"]))}
+
+    def _save(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp, self.index_path)
+        self._dirty = False
+
+    def key(self, text, voice):
+        return content_key("tts", text.strip(), os.path.basename(voice))
+
+    def _remember(self, key, pcm):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = pcm
+        self._memory_size += len(pcm)
+        while self._memory_size > self.memory_bytes and len(self._memory) > 1:
+            _, old = self._memory.popitem(last=False)
+            self._memory_size -= len(old)
+
+    def get(self, text, voice):
+        """Returns cached PCM bytes or None."""
+        key = self.key(text, voice)
+        with self._lock:
+            pcm = self._memory.get(key)
+            entry = self._index.get(key)
+            if pcm is not None:
+                self._memory.move_to_end(key)
+                self._touch(entry)
+                self.hits += 1
+                return pcm
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                with open(os.path.join(self.root, entry["file"]), "rb") as f:
+                    pcm = f.read()
+            except OSError:
+                del self._index[key]
+                self.misses += 1
+                return None
+            self._touch(entry)
+            self._remember(key, pcm)
+            self.hits += 1
+            return pcm
+
+    def _touch(self, entry):
+        if entry is not None:
+            entry["last_used"] = time.time()
+            self._dirty = True
+
+    def contains(self, text, voice):
+        key = self.key(text, voice)
+        with self._lock:
+            return key in self._memory or key in self._index
+
+    def put(self, text, voice, pcm, sample_rate):
+        if not pcm:
+            return
+        key = self.key(text, voice)
+        filename = f"{key}.pcm"
+        with self._lock:
+            with open(os.path.join(self.root, filename), "wb") as f:
+                f.write(pcm)
+            self._index[key] = {
+                "file": filename,
+                "size": len(pcm),
+                "text": text,
+                "sample_rate": sample_rate,
+                "last_used": time.time(),
+            }
+            self._remember(key, pcm)
+            self._evict()
+            self._save()
+
+    def _evict(self):
+        total = sum(e["size"] for e in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            entry = self._index.pop(key)
+            total -= entry["size"]
+            try:
+                os.remove(os.path.join(self.root, entry["file"]))
+            except OSError:
+                pass
+            print(f"{Fore.YELLOW}🗑️ TTS cache: evicted '{entry['text'][:40]}'")
+
+    def flush(self):
+        """Persists last-used times (hits only update them in memory). Call on shutdown."""
+        with self._lock:
+            if self._dirty:
+                self._save()
@@ -0,0 +1,226 @@
+import json
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+import sounddevice as sd
+from colorama import Fore
+
+DEFAULT_SAMPLE_RATE = 22050 # Piper "medium" voices
+READ_CHUNK = 4096           # Bytes of PCM per stdout read
+TAIL_GAP = 0.05             # Quiet stdout after Piper logs a sentence as done
+IDLE_FALLBACK = 1.0         # End a sentence on this much silence if no log line ever comes
+SENTENCE_TIMEOUT = 30.0
+DONE_MARKER = "Real-time factor" # Piper logs this to stderr after each line
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+|\n+")
+
+
+def split_sentences(fragments):
+    """
+    Yields whole sentences from a string or from an iterable of text fragments
+    (e.g. streamed LLM tokens) as soon as each sentence is complete.
+    """
+    if isinstance(fragments, str):
+        fragments = [fragments]
+    pending = ""
+    for fragment in fragments:
+        pending += fragment
+        while True:
+            match = _SENTENCE_END.search(pending)
+            if not match:
+                break
+            sentence = pending[:match.start()] + match.group(0).strip()
+            pending = pending[match.end():]
+            if sentence.strip():
+                yield " ".join(sentence.split())
+    if pending.strip():
+        yield " ".join(pending.split())
+
+
+def voice_sample_rate(model_path):
+    """Reads the output rate from the voice's .onnx.json config."""
+    try:
+        with open(model_path + ".json", "r", encoding="utf-8") as f:
+            return int(json.load(f)["audio"]["sample_rate"])
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_SAMPLE_RATE
+
+
+def _discard(data):
+    pass
+
+
+class PiperWorker:
+    """
+    One long-lived Piper process in --output-raw mode: a line of text in on
+    stdin, 16-bit mono PCM out on stdout. Sentences are synthesized one at a time.
+    """
+
+    def __init__(self, piper_path, model_path):
+        self.piper_path = piper_path
+        self.model_path = model_path
+        self.sample_rate = voice_sample_rate(model_path)
+        self.proc = None
+        self._chunks = None
+        self._completed = 0
+        self._errors = []
+        self._lock = threading.Lock()
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        self._chunks = queue.Queue()
+        self._completed = 0
+        self.proc = subprocess.Popen(
+            [self.piper_path, "--model", self.model_path, "--output-raw"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            cwd=os.path.dirname(self.piper_path) or None # espeak-ng-data lives next to the binary
+        )
+        threading.Thread(target=self._pump_audio, args=(self.proc, self._chunks), daemon=True).start()
+        threading.Thread(target=self._pump_log, args=(self.proc,), daemon=True).start()
+        print(f"{Fore.GREEN}🔊 Piper worker started ({self.sample_rate} Hz).")
+
+    def _pump_audio(self, proc, chunks):
+        fd = proc.stdout.fileno()
+        while True:
+            data = os.read(fd, READ_CHUNK)
+            if not data:
+                break
+            chunks.put(data)
+        chunks.put(None) # EOF: process exited
+
+    def _pump_log(self, proc):
+        for raw in proc.stderr:
+            line = raw.decode("utf-8", errors="ignore").rstrip()
+            if DONE_MARKER in line:
+                self._completed += 1
+            elif "error" in line.lower():
+                self._errors.append(line)
+
+    def synthesize(self, sentence, emit, cancelled=None):
+        """
+        Streams one sentence's PCM to emit(bytes) as Piper produces it.
+        Returns False if the worker died or the sentence was cancelled.
+        """
+        with self._lock:
+            if not self.alive():
+                self.start()
+            target = self._completed + 1
+            try:
+                self.proc.stdin.write((sentence.replace("\n", " ") + "\n").encode("utf-8"))
+                self.proc.stdin.flush()
+            except OSError as e:
+                print(f"{Fore.RED}❌ Piper pipe closed: {e}")
+                self.stop()
+                return False
+
+            started = last_audio = time.time()
+            got_audio = aborted = False
+            while True:
+                if not aborted and cancelled is not None and cancelled.is_set():
+                    # Piper can't be interrupted mid-line: drain this sentence silently
+                    # so its tail doesn't leak into the next one
+                    emit, aborted = _discard, True
+                try:
+                    data = self._chunks.get(timeout=TAIL_GAP)
+                except queue.Empty:
+                    idle = time.time() - last_audio
+                    if self._completed >= target or (got_audio and idle > IDLE_FALLBACK):
+                        return not aborted
+                    if time.time() - started > SENTENCE_TIMEOUT:
+                        print(f"{Fore.RED}❌ Piper timed out on: {sentence[:40]}")
+                        self.stop()
+                        return False
+                    continue
+                if data is None:
+                    print(f"{Fore.RED}❌ Piper Error: {' '.join(self._errors[-3:]) or 'process exited'}")
+                    self.stop()
+                    return False
+                got_audio = True
+                last_audio = time.time()
+                emit(data)
+
+    def stop(self):
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=2)
+        except Exception:
+            self.proc.kill()
+        self.proc = None
+
+
+class AudioPlayer:
+    """
+    Plays queued 16-bit mono PCM on one open output stream from its own thread,
+    so the next sentence can be synthesized while this one plays.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue()
+        self._stream = None
+        threading.Thread(target=self._run, name="tts-player", daemon=True).start()
+
+    def _ensure_stream(self):
+        if self._stream is None:
+            self._stream = sd.RawOutputStream(samplerate=self.sample_rate, channels=1, dtype="int16")
+            self._stream.start()
+        return self._stream
+
+    def _run(self):
+        carry = b""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                carry = b"" # stop(): a half sample from the dropped audio must not shift the next
+                continue
+            if isinstance(item, threading.Event):
+                # Marker: everything queued before it has been handed to the device
+                if self._stream is not None:
+                    time.sleep(self._stream.latency)
+                item.set()
+                continue
+            data = carry + item
+            usable = len(data) - len(data) % 2 # Never split a sample across writes
+            carry = data[usable:]
+            stream = None
+            try:
+                stream = self._ensure_stream()
+                stream.write(data[:usable])
+            except Exception as e:
+                if stream is self._stream: # Not just aborted by stop()
+                    print(f"{Fore.RED}❌ Playback Error: {e}")
+                    self._stream = None
+
+    def play(self, pcm):
+        self._queue.put(pcm)
+
+    def stop(self):
+        """Drops everything queued and cuts off what the device is playing."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+        self._queue.put(None)
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.abort()
+                stream.close()
+            except Exception:
+                pass
+
+    def mark(self):
+        """Returns an Event that is set once everything queued so far has played."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done
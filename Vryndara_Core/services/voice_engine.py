@@ -3,29 +3,103 @@ import sys
 import time
 import queue
 import logging
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import sounddevice as sd
-import scipy.io.wavfile as wav
 import numpy as np
 from faster_whisper import WhisperModel
 from colorama import Fore, Style, init
 
+from .tts_cache import TTSCache
+from .tts_worker import AudioPlayer, PiperWorker, split_sentences
+
 # Initialize colors
 init(autoreset=True)
 
 # Configuration
 MODEL_PATH = os.path.join("models", "faster-whisper-small")
-PIPER_MODEL = os.path.join("models", "piper-voice-ryan", "en_US-ryan-medium.onnx")
-PIPER_BINARY = "piper.exe" # Ensure this is in your PATH or provide full path
+PIPER_MODEL = os.path.join(os.getcwd(), "models", "piper-voice-ryan", "en_US-ryan-medium.onnx")
+PIPER_BINARY = os.path.join(os.getcwd(), "piper", "piper.exe") # The 'piper' subfolder next to the models
 SAMPLE_RATE = 16000
 CHANNELS = 1
 
+# Capture / VAD
+BLOCK_SIZE = 1600             # 100 ms per audio callback
+VAD_FRAME = 160               # 10 ms frames for voice activity decisions
+VOICE_THRESHOLD = 0.008       # RMS that counts as speech (quiet voices included)
+PRE_ROLL_SECONDS = 0.3        # Kept from before the onset so the first syllable isn't cut
+PHRASE_PAUSE_SECONDS = 0.4    # A pause this long hands the phrase to Whisper early
+MIN_PHRASE_SECONDS = 1.0      # Shorter phrases wait to be merged with the next one
+MAX_UTTERANCE_SECONDS = 30
+BARGE_IN_FACTOR = 3.0         # While speaking, speech must be this much louder (our own voice leaks in)
+
+# Fixed replies synthesized into the TTS cache at startup so they play instantly
+PREWARM_PHRASES = [
+    "Eyes online.",
+    "Shutting down systems. Goodbye.",
+    "I'll tell you when it's ready.",
+    "I could not understand the request.",
+    "An error occurred.",
+]
+
+
+def frame_rms(samples, frame=VAD_FRAME):
+    """RMS per frame in one vectorized pass (a partial last frame is dropped)."""
+    usable = len(samples) - len(samples) % frame
+    if usable == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:usable].reshape(-1, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+class AudioRing:
+    """
+    Preallocated float32 ring buffer addressed by absolute sample position.
+    One writer (the audio callback), one reader that stays within capacity.
+    """
+
+    def __init__(self, capacity):
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.written = 0
+
+    def write(self, samples):
+        total = len(samples)
+        if total > self.capacity:
+            samples = samples[-self.capacity:]
+        n = len(samples)
+        start = (self.written + total - n) % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:n - first] = samples[first:]
+        self.written += total
+
+    def oldest(self):
+        return max(0, self.written - self.capacity)
+
+    def read(self, start, end):
+        """Copy of samples [start, end); start is clamped to what is still held."""
+        start = max(start, self.oldest())
+        length = end - start
+        if length <= 0:
+            return np.zeros(0, dtype=np.float32)
+        a = start % self.capacity
+        if a + length <= self.capacity:
+            return self.buffer[a:a + length].copy()
+        return np.concatenate((self.buffer[a:], self.buffer[:a + length - self.capacity]))
+
 class VoiceEngine:
-    def __init__(self):
+    def __init__(self, transcriber=None, prewarm=PREWARM_PHRASES):
         print(f"{Fore.CYAN}🎧 Initializing Ears (Whisper)...")
-        
+
+        # A shared TranscriptionService (kernel) replaces the in-process model
+        self.transcriber = transcriber if transcriber is not None and transcriber.available else None
+        if self.transcriber is not None:
+            self.model = None
+            print(f"{Fore.GREEN}✅ Ears Ready (transcription service).")
         # Check if model exists
-        if not os.path.exists(MODEL_PATH):
+        elif not os.path.exists(MODEL_PATH):
             print(f"{Fore.RED}❌ Error: Whisper model not found at {MODEL_PATH}")
             self.model = None
         else:
@@ -38,132 +112,220 @@ class VoiceEngine:
                 print(f"{Fore.RED}❌ Failed to load Whisper: {e}")
                 self.model = None
 
-    def listen(self, silence_limit=1.5, threshold=0.015):
+        # Render notifications may speak from another thread
+        self._speak_lock = threading.Lock()
+        # Mouth: one resident Piper process streaming PCM to an open output stream
+        if os.path.exists(PIPER_BINARY):
+            self.tts = PiperWorker(PIPER_BINARY, PIPER_MODEL)
+            self.player = AudioPlayer(self.tts.sample_rate)
+            self.tts_cache = TTSCache()
+            if prewarm:
+                threading.Thread(target=self.prewarm, args=(prewarm,), name="tts-prewarm", daemon=True).start()
+        else:
+            self.tts = None
+            self.player = None
+            self.tts_cache = None
+        # One worker keeps in-process phrase transcriptions in order
+        self._whisper_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+
+    def listen(self, silence_limit=1.5, threshold=VOICE_THRESHOLD, duration=MAX_UTTERANCE_SECONDS,
+               on_speech_start=None):
         """
         Smart Listening: Waits for you to speak, and stops when you are quiet.
+        Audio stays in memory; each pause-delimited phrase is transcribed while
+        you keep talking, so only the last phrase is left when you stop.
+        duration caps how long a single utterance may run (seconds).
+        on_speech_start() is called the moment voice is detected (barge-in).
         """
-        if not self.model:
+        if not self.model and self.transcriber is None:
             return input(f"{Fore.YELLOW}🎤 (Text Mode) Enter command: {Style.RESET_ALL}")
 
         print(f"{Fore.CYAN}🎤 Waiting for your voice... (Speak whenever you are ready)")
-        
-        q = queue.Queue()
+
+        pre_roll = int(PRE_ROLL_SECONDS * SAMPLE_RATE)
+        max_samples = int(duration * SAMPLE_RATE)
+        ring = AudioRing(max_samples + pre_roll + SAMPLE_RATE)
+        positions = queue.Queue()
+
         def callback(indata, frames, time, status):
-            q.put(indata.copy())
+            # Audio thread: copy into the ring and hand over the new write position
+            ring.write(indata[:, 0])
+            positions.put(ring.written)
 
-        audio_buffer = []
+        stop_threshold = threshold * 0.75
+        texts = []          # Earlier phrases, used to prime in-process Whisper
+        pending = []        # Futures of submitted phrases
         is_speaking = False
-        silence_time = 0
-
-        # A small pre-buffer so we don't cut off the first letter of your sentence
-        pre_buffer = []
+        speech_start = 0    # Absolute sample position where the utterance began
+        phrase_start = 0    # Start of the phrase not yet sent to Whisper
+        silence_start = None
+        read_pos = 0
 
         try:
             # Forcing channels=1 often fixes Windows laptop microphone issues!
-            with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, callback=callback):
+            with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype="float32",
+                                blocksize=BLOCK_SIZE, callback=callback):
                 print(f"{Fore.CYAN}🎤 Mic is LIVE. Speak to see the volume meter move...")
                 while True:
-                    chunk = q.get()
-                    
-                    # Calculate the volume level
-                    rms = np.sqrt(np.mean(chunk**2))
+                    pos = positions.get()
+                    read_pos = max(read_pos, ring.oldest())
+                    levels = frame_rms(ring.read(read_pos, pos))
+                    if not len(levels):
+                        continue
+                    frames_start = read_pos
+                    read_pos += len(levels) * VAD_FRAME
 
-                    # --- THE LIVE VOLUME METER ---
                     if not is_speaking:
-                        # Print a visual bar so you can see your mic levels
-                        level = int(rms * 1000)  # Scale up for visibility
-                        meter = "█" * min(level, 30)
-                        print(f"\rVolume: [{meter.ljust(30)}] (Level: {rms:.5f})", end="")
-
-                    # Using an ultra-low threshold of 0.008 to detect even the slightest voice (like a whisper)
-                    if rms > 0.008:
-                        if not is_speaking:
-                            print(f"\n{Fore.GREEN}⏺️ Voice detected! Recording...")
-                            is_speaking = True
-                        silence_time = 0
-                    
-                    if is_speaking:
-                        audio_buffer.append(chunk)
-                        if rms <= 0.006:
-                            silence_time += len(chunk) / SAMPLE_RATE
-                            if silence_time > silence_limit:
-                                break
+                        start_threshold = threshold * BARGE_IN_FACTOR if self.is_speaking() else threshold
+                        loud = np.flatnonzero(levels > start_threshold)
+                        if not len(loud):
+                            # --- THE LIVE VOLUME METER ---
+                            rms = float(levels.max()) if len(levels) else 0.0
+                            meter = "█" * min(int(rms * 1000), 30)
+                            print(f"\rVolume: [{meter.ljust(30)}] (Level: {rms:.5f})", end="")
+                            continue
+                        print(f"\n{Fore.GREEN}⏺️ Voice detected! Recording...")
+                        is_speaking = True
+                        if on_speech_start is not None:
+                            on_speech_start()
+                        onset = frames_start + int(loud[0]) * VAD_FRAME
+                        speech_start = phrase_start = max(onset - pre_roll, ring.oldest())
+                        levels = levels[loud[0]:]
+                        frames_start = onset
+
+                    # Track the trailing run of quiet frames
+                    quiet = levels <= stop_threshold
+                    if quiet.all():
+                        if silence_start is None:
+                            silence_start = frames_start
                     else:
-                        pre_buffer.append(chunk)
-                        if len(pre_buffer) > 10:
-                            pre_buffer.pop(0)
+                        last_loud = len(quiet) - int(np.argmin(quiet[::-1]))
+                        silence_start = frames_start + last_loud * VAD_FRAME if last_loud < len(quiet) else None
+
+                    silence = (read_pos - silence_start) / SAMPLE_RATE if silence_start is not None else 0.0
+                    if silence > silence_limit or read_pos - speech_start >= max_samples:
+                        break
+
+                    # A short pause closes a phrase: transcribe it while the user keeps talking
+                    if (silence >= PHRASE_PAUSE_SECONDS
+                            and silence_start - phrase_start >= MIN_PHRASE_SECONDS * SAMPLE_RATE):
+                        pending.append(self._submit_phrase(ring.read(phrase_start, silence_start), texts))
+                        phrase_start = silence_start
+
+            # Whatever is left after the last pause (trailing silence excluded)
+            end = silence_start if silence_start is not None else read_pos
+            if end - phrase_start >= VAD_FRAME:
+                pending.append(self._submit_phrase(ring.read(phrase_start, end), texts))
 
             print(f"{Fore.CYAN}⏳ Transcribing...")
-            audio_data = np.concatenate(audio_buffer, axis=0)
-            
-            # Save the file for Whisper
-            temp_wav = "temp_input.wav"
-            wav.write(temp_wav, SAMPLE_RATE, audio_data)
-            
-            # Transcribe
-            segments, _ = self.model.transcribe(temp_wav, beam_size=5)
-            text = " ".join([segment.text for segment in segments]).strip()
-            
+            text = " ".join(t for t in (future.result() for future in pending) if t).strip()
+
             # Ignore weird Whisper hallucinations (like the Georgian text from earlier)
             if len(text) < 2:
                 return ""
-                
+
             print(f"{Fore.MAGENTA}🗣️ You said: {text}")
             return text
-            
+
         except Exception as e:
             print(f"{Fore.RED}❌ Recording Error: {e}")
             return ""
 
-    def speak(self, text):
+    def _submit_phrase(self, audio, texts):
+        """Returns a Future[str]; results are joined in submission order."""
+        if self.transcriber is not None:
+            # Phrases may run on different workers, so no prompt chaining here
+            return self.transcriber.submit(audio)
+        return self._whisper_worker.submit(self._transcribe_phrase, audio, texts)
+
+    def _transcribe_phrase(self, audio, texts):
+        """Runs on the single transcription worker, so phrases finish in order."""
+        # Earlier phrases prime Whisper so words split across a pause still read naturally
+        prompt = " ".join(texts) or None
+        segments, _ = self.model.transcribe(audio, beam_size=5, initial_prompt=prompt)
+        text = " ".join(segment.text for segment in segments).strip()
+        if text:
+            texts.append(text)
+        return text
+
+    def speak(self, text, cancel=None):
         """
-        Uses Piper TTS with the correct subfolder path.
+        Speaks a string, or an iterable of text fragments (e.g. streamed LLM
+        tokens) sentence by sentence: each sentence plays while the next one
+        is synthesized by the resident Piper worker.
+        Setting `cancel` (threading.Event) stops speech mid-sentence.
         """
-        print(f"{Fore.BLUE}🤖 Vryndara: {text}")
-
-        base_dir = os.getcwd()
-        
-        # FIX: Point to the 'piper' subfolder
-        piper_exe = os.path.join(base_dir, "piper", "piper.exe")
-        
-        model_path = os.path.join(base_dir, "models", "piper-voice-ryan", "en_US-ryan-medium.onnx")
-        output_file = os.path.join(base_dir, "response.wav")
-
-        if not os.path.exists(piper_exe):
-            print(f"{Fore.RED}❌ Critical: piper.exe not found at: {piper_exe}")
+        with self._speak_lock:
+            self._speak(text, cancel)
+
+    def is_speaking(self):
+        return self._speak_lock.locked()
+
+    def close(self):
+        """Saves the TTS cache's LRU order and stops the Piper worker. Call on shutdown."""
+        if self.tts_cache is not None:
+            self.tts_cache.flush()
+        if self.tts is not None:
+            self.tts.stop()
+
+    def _speak(self, text, cancel=None):
+        if isinstance(text, str):
+            print(f"{Fore.BLUE}🤖 Vryndara: {text}")
+
+        if self.tts is None:
+            print(f"{Fore.RED}❌ Critical: piper.exe not found at: {PIPER_BINARY}")
             return
 
         try:
-            cmd = [piper_exe, "--model", model_path, "--output_file", output_file]
-            
-            # Run Piper
-            process = subprocess.run(cmd, input=text.encode('utf-8'), capture_output=True)
-            
-            if process.returncode != 0:
-                # Print the error so we know if espeak-data is missing
-                print(f"{Fore.RED}❌ Piper Error: {process.stderr.decode('utf-8', errors='ignore')}")
-                return
-
-            # Play Audio
-            if os.path.exists(output_file):
-                fs, data = wav.read(output_file)
-
-                # SoundDevice hates int64. We convert to int16 (standard audio).
-                if data.dtype != np.int16:
-                    data = data.astype(np.int16)
-                # -----------------------------------------
-
-                sd.play(data, fs)
-                sd.wait()
-
+            for sentence in split_sentences(text):
+                if cancel is not None and cancel.is_set():
+                    break
+                if not isinstance(text, str):
+                    print(f"{Fore.BLUE}🤖 Vryndara: {sentence}")
+                self._say_sentence(sentence, cancel)
+            # Return once the last sentence has actually been heard (or we're cut off)
+            played = self.player.mark()
+            while not played.wait(0.05):
+                if cancel is not None and cancel.is_set():
+                    break
+            if cancel is not None and cancel.is_set():
+                self.player.stop()
+                print(f"{Fore.YELLOW}✋ Speech interrupted.")
         except Exception as e:
             print(f"{Fore.RED}❌ Speech Error: {e}")
 
+    def _say_sentence(self, sentence, cancel=None):
+        pcm = self.tts_cache.get(sentence, PIPER_MODEL)
+        if pcm is not None:
+            self.player.play(pcm)
+            return
+        # Play as Piper streams, and keep a copy for next time
+        parts = []
+        def emit(data):
+            parts.append(data)
+            self.player.play(data)
+        if self.tts.synthesize(sentence, emit, cancel):
+            self.tts_cache.put(sentence, PIPER_MODEL, b"".join(parts), self.tts.sample_rate)
+
+    def prewarm(self, phrases):
+        """Synthesizes (without playing) any phrase sentences not cached yet."""
+        warmed = 0
+        for phrase in phrases:
+            for sentence in split_sentences(phrase):
+                if self.tts_cache.contains(sentence, PIPER_MODEL):
+                    continue
+                parts = []
+                if self.tts.synthesize(sentence, parts.append):
+                    self.tts_cache.put(sentence, PIPER_MODEL, b"".join(parts), self.tts.sample_rate)
+                    warmed += 1
+        if warmed:
+            print(f"{Fore.GREEN}🔊 TTS cache: pre-warmed {warmed} phrase(s).")
+
 if __name__ == "__main__":
     # Test Loop
     bot = VoiceEngine()
     while True:
-        user_input = bot.listen(duration=4) # Listen for 4 seconds
+        user_input = bot.listen(duration=4) # At most 4 seconds per utterance
         if "exit" in user_input.lower():
             break
         if user_input:
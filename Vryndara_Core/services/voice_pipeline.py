@@ -0,0 +1,175 @@
+import queue
+import threading
+from colorama import Fore
+
+
+_END = object() # Marks the end of a turn's fragment stream
+
+
+class Turn:
+    """One command and its reply; cancelling it stops generation and speech."""
+
+    def __init__(self, text):
+        self.text = text
+        self.cancel = threading.Event()
+        self.fragments = queue.Queue() # Streamed reply: reasoning -> playback
+
+    def stream(self):
+        """Yields fragments as the reasoning stage produces them, until done or cancelled."""
+        while not self.cancel.is_set():
+            try:
+                fragment = self.fragments.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if fragment is _END:
+                return
+            yield fragment
+
+
+class VoicePipeline:
+    """
+    Capture -> reasoning -> playback, each on its own thread, linked by queues.
+
+    capture(on_speech_start) -> str   blocks until the next command (default: voice.listen)
+    respond(text, cancel) -> reply     a string, an iterable of text fragments
+                                       (e.g. BrainService.think_stream), or None
+    on_state(state)                    optional: "thinking", "speaking", "idle"
+
+    Streamed replies are generated on the reasoning thread into the turn's
+    fragment queue, which playback speaks from, so generation runs ahead of
+    speech. The microphone stays live while a reply is generated and spoken.
+    New speech (or a new command, see submit) cancels every turn still in
+    flight: barge-in.
+    """
+
+    def __init__(self, voice, respond, capture=None, on_state=None):
+        self.voice = voice
+        self.respond = respond
+        self.capture = capture or (lambda on_speech_start: voice.listen(on_speech_start=on_speech_start))
+        self.on_state = on_state
+        self.commands = queue.Queue()
+        self.replies = queue.Queue()
+        self._active = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stopped = threading.Event()
+
+    def start(self):
+        for name, target in (("capture", self._capture_loop), ("reasoning", self._reasoning_loop),
+                             ("playback", self._playback_loop)):
+            threading.Thread(target=target, name=f"voice-{name}", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self.barge_in()
+        self.commands.put(None)
+        self.replies.put(None)
+
+    def submit(self, text):
+        """Queues a command from any source (mic, keyboard); it supersedes the reply in flight."""
+        if text and text.strip():
+            self.barge_in()
+            self.commands.put(text.strip())
+
+    def say(self, text):
+        """Queues speech that isn't a reply to a command (render notifications, etc.)."""
+        turn = self._begin(Turn(text))
+        self.replies.put((turn, text))
+
+    def barge_in(self):
+        with self._lock:
+            active = [turn for turn in self._active if not turn.cancel.is_set()]
+        for turn in active:
+            turn.cancel.set()
+        if active:
+            print(f"{Fore.YELLOW}✋ Barge-in: cancelled {len(active)} turn(s).")
+
+    def wait_idle(self, timeout=None):
+        """Blocks until nothing is being generated or spoken."""
+        return self._idle.wait(timeout)
+
+    # --- bookkeeping ---
+    def _begin(self, turn):
+        with self._lock:
+            self._active.add(turn)
+            self._idle.clear()
+        return turn
+
+    def _end(self, turn):
+        with self._lock:
+            self._active.discard(turn)
+            if not self._active:
+                self._idle.set()
+        if self.on_state is not None and self._idle.is_set():
+            self._state("idle")
+
+    def _state(self, state):
+        if self.on_state is None:
+            return
+        try:
+            self.on_state(state)
+        except Exception as e:
+            print(f"{Fore.RED}❌ Voice state hook error: {e}")
+
+    # --- stages ---
+    def _capture_loop(self):
+        while not self._stopped.is_set():
+            try:
+                text = self.capture(self.barge_in)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Capture Error: {e}")
+                continue
+            self.submit(text)
+
+    def _reasoning_loop(self):
+        while True:
+            text = self.commands.get()
+            if text is None:
+                return
+            turn = self._begin(Turn(text))
+            self._state("thinking")
+            try:
+                reply = self.respond(text, turn.cancel)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Reasoning Error: {e}")
+                reply = None
+            if reply is None or turn.cancel.is_set():
+                self._end(turn)
+                continue
+            if isinstance(reply, str):
+                self.replies.put((turn, reply))
+                continue
+            # Playback starts on the first sentence while generation continues here
+            self.replies.put((turn, turn.stream()))
+            self._generate(turn, reply)
+
+    def _generate(self, turn, reply):
+        try:
+            for fragment in reply:
+                if turn.cancel.is_set():
+                    break
+                turn.fragments.put(fragment)
+        except Exception as e:
+            print(f"{Fore.RED}❌ Reasoning Error: {e}")
+        finally:
+            close = getattr(reply, "close", None)
+            if close is not None:
+                close() # Frees the LLM slot as soon as generation stops
+            turn.fragments.put(_END)
+
+    def _playback_loop(self):
+        while True:
+            item = self.replies.get()
+            if item is None:
+                return
+            turn, reply = item
+            try:
+                if not turn.cancel.is_set():
+                    self._state("speaking")
+                    self.voice.speak(reply, cancel=turn.cancel)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Playback Error: {e}")
+            finally:
+                self._end(turn)
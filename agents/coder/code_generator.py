@@ -0,0 +1,54 @@
+import re
+
+from sdk.python.vryndara.llm import default_client, PRIORITY_NORMAL, LLAMA_MODEL
+
+# Served by the llama.cpp core; the GGUF is no longer loaded in-process
+MODEL_NAME = LLAMA_MODEL
+
+# Names the engineering service provides to generated code
+SDF_HEADER = "from sdf import sphere, cylinder, union, difference, Z, slab, intersection, box, rounded_box, capsule, pi"
+
+SDF_SYSTEM_PROMPT = """You are a mechanical design agent writing Python for the `sdf` library.
+Rules:
+1. Use only: sphere, cylinder, union, difference, Z, slab, intersection, box, rounded_box, capsule, pi.
+2. Do not write import statements.
+3. Assign the final shape to a variable named `f`.
+4. Output ONLY code. No markdown, no explanations."""
+
+
+def strip_code_fences(text):
+    """Removes markdown fences and stray import lines the model adds anyway."""
+    text = re.sub(r"```(?:python)?", "", text)
+    lines = [line for line in text.splitlines() if not line.strip().startswith(("import ", "from sdf"))]
+    return "\n".join(lines).strip()
+
+
+class CodeGenerator:
+    """
+    Text-to-SDF code generation through the shared LLM client.
+    Used by the kernel (ComputationalEngineer) and the gateway (/api/engineer).
+    """
+
+    def __init__(self, client=None, model=MODEL_NAME):
+        self.client = client or default_client()
+        self.model = model
+
+    def generate_sdf_code(self, prompt):
+        """Returns the SDF body only (no imports)."""
+        result = self.client.generate(
+            prompt=prompt,
+            system=SDF_SYSTEM_PROMPT,
+            model=self.model,
+            priority=PRIORITY_NORMAL,
+            temperature=0.2,
+            max_tokens=768
+        )
+        return strip_code_fences(result.text)
+
+    def generate_code(self, prompt):
+        """Returns runnable code including the sdf import header."""
+        return f"{SDF_HEADER}\n{self.generate_sdf_code(prompt)}"
+
+
+# The kernel knows it by its agent name
+CoderAgent = CodeGenerator
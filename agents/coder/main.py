@@ -6,8 +6,8 @@ import requests # <--- NEW: Needed to talk to the UI
 # Fix imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-import ollama
 from sdk.python.vryndara.client import AgentClient
+from sdk.python.vryndara.llm import default_client
 
 AGENT_ID = "coder-alpha"
 # Use the model you have installed
@@ -16,14 +16,17 @@ MODEL_NAME = "llama3.1:8b"
 # Gateway URL for reporting progress
 GATEWAY_URL = "http://localhost:8081/api/v1/progress"
 
+# Shared client: routes to Ollama and queues behind its concurrency cap
+llm = default_client()
+
 def generate_code(prompt):
     print(f"    [Brain] Thinking with {MODEL_NAME}...")
     try:
-        response = ollama.chat(model=MODEL_NAME, messages=[
+        response = llm.chat(model=MODEL_NAME, messages=[
             {'role': 'system', 'content': 'You are a Python coding agent. Output ONLY code.'},
             {'role': 'user', 'content': prompt},
         ])
-        return response['message']['content']
+        return response.text
     except Exception as e:
         return f"# Error: {str(e)}"
 
@@ -62,11 +65,14 @@ def on_message(signal):
 if __name__ == "__main__":
     # Ensure requests is installed: pip install requests
     try:
-        ollama.list()
-        print(f"✅ Connected to Ollama. Using model: {MODEL_NAME}")
-    except:
-        print("❌ Error: Ollama is not running!")
+        backend = llm.route(MODEL_NAME)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        exit(1)
+    if not backend.health():
+        print(f"❌ Error: {backend.name} is not running!")
         exit(1)
+    print(f"✅ Connected to {backend.name}. Using model: {MODEL_NAME}")
 
     client = AgentClient(AGENT_ID, kernel_address="localhost:50051")
     client.register(["python.generation", "ai.local"])
@@ -3,18 +3,21 @@ import os
 import time
 import json
 import requests
-import ollama # <--- NEW: The Brain
 
 # Fix imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 from sdk.python.vryndara.client import AgentClient
+from sdk.python.vryndara.llm import default_client
 from sdk.python.vryndara.storage import StorageManager
+from sdk.python.vryndara.artifacts import default_registry, SCRIPT, MEDIA
 
 AGENT_ID = "media-director"
 MODEL_NAME = "llama3.1:8b" # Using your local AI
 GATEWAY_URL = "http://localhost:8081/api/v1/progress"
-storage = StorageManager(bucket_name="historabook-output")
+artifacts = default_registry()
+storage = StorageManager(bucket_name="historabook-output", registry=artifacts)
+llm = default_client()
 
 def write_screenplay(context):
     """
@@ -35,18 +38,18 @@ def write_screenplay(context):
     """
 
     try:
-        response = ollama.chat(model=MODEL_NAME, messages=[
+        response = llm.chat(model=MODEL_NAME, messages=[
             {'role': 'system', 'content': 'You are a creative director. Output ONLY the script.'},
             {'role': 'user', 'content': prompt},
         ])
-        script = response['message']['content']
+        script = response.text
         print(f"    [Director] Script Generated ({len(script)} chars).")
         return script
     except Exception as e:
         print(f"    [Director] Error generating script: {e}")
         return "SCENE 1: Error in script generation."
 
-def render_scene(script):
+def render_scene(script, job_id=None):
     """
     Simulates sending the screenplay to Blender/Unreal.
     In the future, this function will parse the script and command Blender.
@@ -56,8 +59,9 @@ def render_scene(script):
     with open(script_filename, "w", encoding="utf-8") as f:
         f.write(script)
     
-    script_url = storage.upload_file(script_filename)
+    script_url = storage.upload_file(script_filename, job_id=job_id, artifact_type=SCRIPT)
     os.remove(script_filename)
+    artifacts.forget_path(script_filename) # Cataloged by its storage URL from here on
 
     print(f"    [Video] Rendering video based on script...")
     time.sleep(3) # Simulate rendering time
@@ -67,8 +71,9 @@ def render_scene(script):
     with open(video_filename, "wb") as f:
         f.write(os.urandom(1024 * 500)) 
         
-    video_url = storage.upload_file(video_filename)
+    video_url = storage.upload_file(video_filename, job_id=job_id, artifact_type=MEDIA)
     os.remove(video_filename)
+    artifacts.forget_path(video_filename) # Cataloged by its storage URL from here on
     
     return script_url, video_url
 
@@ -83,7 +88,7 @@ def on_message(signal):
         screenplay = write_screenplay(raw_input)
         
         # 2. ACTION STEP: Render the Video
-        script_link, video_link = render_scene(screenplay)
+        script_link, video_link = render_scene(screenplay, job_id=signal.id)
         
         response_payload = f"SCRIPT: {script_link}\nVIDEO: {video_link}"
 
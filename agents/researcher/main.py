@@ -1,7 +1,6 @@
 import sys
 import os
 import requests
-from duckduckgo_search import DDGS # Using the web browser
 
 # Fix imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
@@ -11,6 +10,14 @@ from sdk.python.vryndara.client import AgentClient
 AGENT_ID = "researcher-1"
 GATEWAY_URL = "http://localhost:8081/api/v1/progress"
 
+# "ddg" = live web search, "sim" = offline simulator (no network needed)
+SEARCH_PROVIDER = os.environ.get("VRYNDARA_SEARCH", "ddg")
+
+if SEARCH_PROVIDER == "sim":
+    from sdk.python.vryndara.simulator import FakeSearchProvider as DDGS
+else:
+    from duckduckgo_search import DDGS # Using the web browser
+
 def search_web(topic):
     # CLEAN THE QUERY: Remove "Find facts about" to get better results
     clean_query = topic.replace("Find interesting facts about", "") \
@@ -1,16 +1,48 @@
 import asyncio
 import json
+import struct
 import grpc
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from protos import vryndara_pb2, vryndara_pb2_grpc
+from gateway.fanout import Broadcaster
+
+# Hand tracking arrives far faster than a browser paints; positions are
+# coalesced to the latest one per tick. Discrete events are never dropped.
+GESTURE_TICK = 1 / 60
+
+# Binary hand-position frame (/ws?mode=binary): frame type, x, y (little-endian)
+FRAME_HAND_POSITION = 1
+HAND_POSITION = struct.Struct("<Bff")
+
+def pack_hand_position(data):
+    """Packed frame for a plain position update, or None if it isn't one."""
+    try:
+        return HAND_POSITION.pack(FRAME_HAND_POSITION, float(data["x"]), float(data["y"]))
+    except (KeyError, TypeError, ValueError):
+        return None
 
 class KernelBridge:
     def __init__(self):
         self.channel = None
         self.stub = None
-        self.active_connections = []
+        # Per-client queues: a slow browser tab never backs up the kernel stream
+        self.clients = Broadcaster()
+        self.pending_position = None # Latest (payload, packed frame) not yet sent
+
+    def flush_position(self):
+        if self.pending_position is not None:
+            payload, packed = self.pending_position
+            self.pending_position = None
+            # Superseded by the next tick anyway, so a lagging client may shed it
+            self.clients.broadcast(payload, binary=packed, droppable=True)
+
+    async def stream_positions(self):
+        """Sends at most one coalesced hand position per tick."""
+        while True:
+            await asyncio.sleep(GESTURE_TICK)
+            self.flush_position()
 
     async def stream_from_kernel(self):
         # Initialize channel INSIDE the async loop
@@ -25,7 +57,7 @@ class KernelBridge:
                 # --- COGNITIVE FEEDBACK LOGIC ---
                 # If the signal is a task request or memory search, notify the UI
                 status = "IDLE"
-                if signal.type in ["TASK_REQUEST", "MEMORY_RETRIEVAL", "WORKFLOW_START"]:
+                if signal.type in ["TASK_REQUEST", "MEMORY_RETRIEVAL", "WORKFLOW_START", "WORKFLOW_STEP"]:
                     status = "THINKING"
                 
                 payload = {
@@ -34,14 +66,20 @@ class KernelBridge:
                     "timestamp": signal.timestamp,
                     "status": status  # This triggers the purple glow in React
                 }
-                
-                # Clean up closed connections while broadcasting
-                for connection in self.active_connections[:]:
-                    try:
-                        await connection.send_text(json.dumps(payload))
-                    except:
-                        self.active_connections.remove(connection)
-                        
+
+                data = payload["data"]
+                if signal.type == "GESTURE_EVENT" and isinstance(data, dict) and not data.get("gesture"):
+                    packed = pack_hand_position(data)
+                    if packed is not None:
+                        # Only the newest position matters; the tick task sends it
+                        self.pending_position = (payload, packed)
+                        continue
+
+                # Discrete events go out at once, after any position they follow
+                self.flush_position()
+                # Serialized once, queued for every browser without waiting on any
+                self.clients.broadcast(payload)
+
         except Exception as e:
             print(f"❌ Kernel Stream Error: {e}")
 
@@ -51,8 +89,11 @@ bridge = KernelBridge()
 async def lifespan(app: FastAPI):
     # This runs exactly when the server starts
     task = asyncio.create_task(bridge.stream_from_kernel())
+    ticker = asyncio.create_task(bridge.stream_positions())
     yield
+    ticker.cancel()
     # This runs when the server stops
+    await bridge.clients.close()
     if bridge.channel:
         await bridge.channel.close()
 
@@ -67,16 +108,18 @@ app.add_middleware(
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    bridge.active_connections.append(websocket)
-    print(f"🌐 New Browser Connection: {websocket.client}")
+    # ?mode=binary: hand positions arrive as packed frames, everything else stays JSON
+    mode = "binary" if websocket.query_params.get("mode") == "binary" else "json"
+    await bridge.clients.connect(websocket, mode=mode)
+    print(f"🌐 New Browser Connection: {websocket.client} ({mode})")
     try:
         while True:
             # Keep connection alive
             await websocket.receive_text()
     except:
-        if websocket in bridge.active_connections:
-            bridge.active_connections.remove(websocket)
+        pass
+    finally:
+        bridge.clients.disconnect(websocket)
 
 if __name__ == "__main__":
     import uvicorn
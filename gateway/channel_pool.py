@@ -0,0 +1,112 @@
+import asyncio
+import itertools
+import os
+
+import grpc
+
+KERNEL_ADDRESS = os.environ.get("VRYNDARA_KERNEL_ADDRESS", "localhost:50051")
+POOL_SIZE = int(os.environ.get("VRYNDARA_KERNEL_CHANNELS", "2"))
+HEALTH_INTERVAL = 10   # Seconds between channel state checks
+READY_TIMEOUT = 5      # Seconds to wait for a channel to (re)connect
+REPLACE_AFTER = 3      # Failed checks in a row before a channel is rebuilt
+
+# Keepalive pings hold idle HTTP/2 connections open and catch dead ones early.
+# The kernel server allows pings at this rate (see kernel/main.py).
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.initial_reconnect_backoff_ms", 500),
+    ("grpc.max_reconnect_backoff_ms", 5000),
+    # Transcription uploads carry base64 audio
+    ("grpc.max_send_message_length", 64 * 1024 * 1024),
+    ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+]
+
+
+class _PooledChannel:
+    def __init__(self, address, options, stub_factory):
+        self.channel = grpc.aio.insecure_channel(address, options=options)
+        self.stub = stub_factory(self.channel)
+        self.failures = 0
+
+    def state(self):
+        return self.channel.get_state(try_to_connect=True)
+
+
+class ChannelPool:
+    """
+    Long-lived gRPC channels to the kernel, shared by every gateway route.
+    Created at app startup; a background task watches channel state and
+    rebuilds channels that stay unreachable.
+    """
+
+    def __init__(self, stub_factory, address=KERNEL_ADDRESS, size=POOL_SIZE, options=CHANNEL_OPTIONS):
+        self.stub_factory = stub_factory
+        self.address = address
+        self.size = max(1, size)
+        self.options = options
+        self._channels = []
+        self._next = itertools.count()
+        self._monitor = None
+
+    async def start(self):
+        self._channels = [self._open() for _ in range(self.size)]
+        # Connect now so the first request doesn't pay the handshake; a kernel
+        # that isn't up yet is fine, channels keep retrying in the background
+        ready = await asyncio.gather(*(self._wait_ready(c) for c in self._channels))
+        self._monitor = asyncio.create_task(self._watch())
+        print(f"🔌 [Gateway] Kernel channel pool: {sum(ready)}/{self.size} connected to {self.address}")
+
+    def _open(self):
+        return _PooledChannel(self.address, self.options, self.stub_factory)
+
+    async def _wait_ready(self, pooled):
+        try:
+            await asyncio.wait_for(pooled.channel.channel_ready(), READY_TIMEOUT)
+            pooled.failures = 0
+            return True
+        except (asyncio.TimeoutError, grpc.RpcError):
+            pooled.failures += 1
+            return False
+
+    def stub(self):
+        """Round-robins over channels, preferring ones that are connected."""
+        if not self._channels:
+            raise RuntimeError("Kernel channel pool is not started")
+        start = next(self._next)
+        for i in range(len(self._channels)):
+            pooled = self._channels[(start + i) % len(self._channels)]
+            if pooled.state() in (grpc.ChannelConnectivity.READY, grpc.ChannelConnectivity.IDLE):
+                return pooled.stub
+        # None connected: any channel will queue the RPC until it reconnects
+        return self._channels[start % len(self._channels)].stub
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(HEALTH_INTERVAL)
+            for i, pooled in enumerate(list(self._channels)):
+                if pooled.state() == grpc.ChannelConnectivity.READY:
+                    pooled.failures = 0
+                    continue
+                if await self._wait_ready(pooled):
+                    continue
+                if pooled.failures >= REPLACE_AFTER:
+                    print(f"🔌 [Gateway] Kernel channel {i} unreachable; reconnecting.")
+                    self._channels[i] = self._open()
+                    await pooled.channel.close()
+
+    def health(self):
+        states = [pooled.state().name for pooled in self._channels]
+        return {
+            "address": self.address,
+            "channels": states,
+            "ready": states.count(grpc.ChannelConnectivity.READY.name),
+        }
+
+    async def close(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+        await asyncio.gather(*(pooled.channel.close() for pooled in self._channels), return_exceptions=True)
+        self._channels = []
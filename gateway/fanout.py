@@ -0,0 +1,151 @@
+import asyncio
+import json
+from collections import deque
+
+QUEUE_SIZE = 256    # Outbound frames buffered per client
+SEND_TIMEOUT = 5    # Seconds a single send may take before the client is dropped
+MAX_DROPPED = 1024  # Droppable frames shed in a row (client not draining) before it is dropped
+
+
+def encode(message):
+    """Serializes a message once into a frame every client can share."""
+    if isinstance(message, (str, bytes)):
+        return message
+    return json.dumps(message)
+
+
+class _Client:
+    def __init__(self, websocket, queue_size, mode):
+        self.websocket = websocket
+        self.mode = mode # "json", or "binary" for clients that accept packed frames
+        self.queue_size = queue_size
+        self.frames = deque() # (frame, droppable)
+        self.ready = asyncio.Event()
+        self.dropped = 0 # Frames shed since the last successful send
+        self.task = None
+
+    def shed(self):
+        """Removes the oldest droppable frame; False if every queued frame must be kept."""
+        for i, (_, droppable) in enumerate(self.frames):
+            if droppable:
+                del self.frames[i]
+                return True
+        return False
+
+    async def get(self):
+        while not self.frames:
+            self.ready.clear()
+            await self.ready.wait()
+        frame, _ = self.frames.popleft()
+        return frame
+
+
+class Broadcaster:
+    """
+    WebSocket fan-out. Every client has a bounded outbound queue drained by
+    its own sender task, so broadcast() never awaits a socket: one slow tab
+    sheds its oldest droppable frames (coalescible updates such as hand
+    positions) instead of holding up the others or the kernel stream.
+    Discrete frames are never shed; a client too far behind to keep them,
+    or that stops draining entirely, is disconnected.
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE, send_timeout=SEND_TIMEOUT, max_dropped=MAX_DROPPED):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.max_dropped = max_dropped
+        self._clients = {} # websocket -> _Client
+        self._closing = set()
+
+    def __len__(self):
+        return len(self._clients)
+
+    async def connect(self, websocket, accept=True, mode="json"):
+        if accept:
+            await websocket.accept()
+        client = _Client(websocket, self.queue_size, mode)
+        client.task = asyncio.create_task(self._sender(client))
+        self._clients[websocket] = client
+        return client
+
+    def disconnect(self, websocket):
+        client = self._clients.pop(websocket, None)
+        if client is not None and client.task is not asyncio.current_task():
+            client.task.cancel()
+
+    def broadcast(self, message, binary=None, droppable=False):
+        """
+        Queues one frame for every client without waiting on any of them.
+        Binary-mode clients get the packed `binary` frame instead, when given.
+        droppable frames may be shed for a lagging client; others never are.
+        """
+        frame = encode(message)
+        for client in list(self._clients.values()):
+            self._offer(client, binary if binary is not None and client.mode == "binary" else frame, droppable)
+
+    def send(self, websocket, message, droppable=False):
+        """Queues a frame for one client."""
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._offer(client, encode(message), droppable)
+
+    def _offer(self, client, frame, droppable):
+        if len(client.frames) >= client.queue_size:
+            # Downsample a lagging client: its oldest droppable frame goes first
+            if client.shed():
+                client.dropped += 1
+            elif droppable:
+                client.dropped += 1
+                return # The queue holds only discrete frames; this update can go
+            else:
+                self._drop_client(client, "would lose a discrete event")
+                return
+            if client.dropped >= self.max_dropped:
+                self._drop_client(client, f"{client.dropped} frames behind")
+                return
+        client.frames.append((frame, droppable))
+        client.ready.set()
+
+    def _drop_client(self, client, reason):
+        print(f"🐢 [Fanout] Dropping slow client {client.websocket.client} ({reason})")
+        self.disconnect(client.websocket)
+        task = asyncio.create_task(self._close(client.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _sender(self, client):
+        websocket = client.websocket
+        try:
+            while True:
+                frame = await client.get()
+                if isinstance(frame, bytes):
+                    await asyncio.wait_for(websocket.send_bytes(frame), self.send_timeout)
+                else:
+                    await asyncio.wait_for(websocket.send_text(frame), self.send_timeout)
+                client.dropped = 0
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            print(f"🐢 [Fanout] Client {websocket.client} stalled; disconnecting.")
+            await self._close(websocket)
+        except Exception:
+            pass # Socket already gone; the receive loop will notice too
+        self.disconnect(websocket)
+
+    @staticmethod
+    async def _close(websocket):
+        try:
+            await websocket.close(code=1013) # Try again later
+        except Exception:
+            pass
+
+    def stats(self):
+        return {
+            "clients": len(self._clients),
+            "queued": sum(len(c.frames) for c in self._clients.values()),
+            "dropped": sum(c.dropped for c in self._clients.values()),
+        }
+
+    async def close(self):
+        for websocket in list(self._clients):
+            self.disconnect(websocket)
@@ -0,0 +1,101 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+WORKERS = 4          # Heavy jobs running at once (LLM calls, SDF meshing, Blender)
+MAX_PENDING = 16     # Queued + running jobs before new ones are refused (HTTP 429)
+KEEP_FINISHED = 1000 # Finished jobs kept for status queries
+
+
+class JobQueueFull(Exception):
+    """Raised by JobRunner.submit when the queue is at capacity."""
+
+
+class Job:
+    def __init__(self, kind, description=""):
+        self.id = f"job-{uuid.uuid4().hex[:12]}"
+        self.kind = kind
+        self.description = description
+        self.status = "queued" # queued -> running -> completed | failed
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.future = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "description": self.description,
+            "status": self.status,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "queue_wait": round(self.started - self.submitted, 3) if self.started else None,
+            "elapsed": round(self.finished - self.started, 3) if self.finished and self.started else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRunner:
+    """
+    Runs blocking gateway work on a bounded thread pool so the event loop
+    (HTTP routes, websockets) never waits on it. Jobs get ids for polling;
+    once MAX_PENDING are in flight, submit() refuses new ones.
+    """
+
+    def __init__(self, workers=WORKERS, max_pending=MAX_PENDING, keep_finished=KEEP_FINISHED):
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gateway-job")
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, description="", with_job=False):
+        """Queues fn(*args), or fn(job, *args) when with_job is set."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs already in flight")
+            self._pending += 1
+            job = Job(kind, description)
+            self._jobs[job.id] = job
+            self._prune()
+        if with_job:
+            args = (job,) + args
+        job.future = self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        job.status, job.started = "running", time.time()
+        try:
+            job.result = fn(*args)
+            job.status = "completed"
+            return job.result
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            raise
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _prune(self):
+        finished = [jid for jid, job in self._jobs.items() if job.finished is not None]
+        for jid in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[jid]
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "max_pending": self.max_pending, "tracked": len(self._jobs)}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
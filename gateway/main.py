@@ -1,12 +1,16 @@
 import asyncio
+import base64
 import sys
-import os
 import json
+import time
+import uuid
+from contextlib import asynccontextmanager
 from typing import List
 from pathlib import Path
 
-from fastapi import FastAPI, WebSocket, HTTPException, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, HTTPException, WebSocketDisconnect, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import grpc
 
@@ -32,6 +36,12 @@ except ImportError:
     vryndara_pb2 = None
     vryndara_pb2_grpc = None
 
+from gateway.channel_pool import ChannelPool
+from gateway.workflows import WorkflowTracker, TRACKER_ID
+from gateway.jobs import JobRunner, JobQueueFull
+from gateway.fanout import Broadcaster
+from sdk.python.vryndara.artifacts import ArtifactRegistry, RENDER, MESH
+
 # Engineering Imports
 try:
     # Check if 'src' exists before importing
@@ -39,6 +49,7 @@ try:
         raise ImportError(f"'src' folder missing in {project_root}")
 
     from Vryndara_Core.services.engineering_service import EngineeringService
+    from Vryndara_Core.services.mesh_cache import MeshCache, mesh_files
     from src.engines.blender_engine import BlenderEngine
     from agents.coder.code_generator import CodeGenerator
     print("✅ Core Modules Imported Successfully")
@@ -46,10 +57,38 @@ except ImportError as e:
     print(f"⚠️ Import Warning: Could not import Engineering modules. {e}")
     print("   Ensure 'src' and 'Vryndara_Core' folders are in the root directory.")
     EngineeringService = None
+    MeshCache = None
+    mesh_files = None
     BlenderEngine = None
     CodeGenerator = None
 
-app = FastAPI()
+# One set of long-lived kernel channels for every route
+kernel_pool = ChannelPool(vryndara_pb2_grpc.KernelStub) if vryndara_pb2_grpc else None
+# Workflow status, fed by the kernel's WORKFLOW_* signals
+workflow_tracker = WorkflowTracker()
+# LLM calls, SDF meshing and renders run here, never on the event loop
+job_runner = JobRunner()
+# Catalog of renders, meshes and uploads, shared with the kernel
+artifacts = ArtifactRegistry()
+RENDER_ROOT = project_root / "engineering_output" / "render_output"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tracker_task = None
+    if kernel_pool:
+        await kernel_pool.start()
+        tracker_task = asyncio.create_task(
+            workflow_tracker.follow(kernel_pool, vryndara_pb2.AgentInfo(id=TRACKER_ID))
+        )
+    yield
+    if tracker_task:
+        tracker_task.cancel()
+    job_runner.shutdown()
+    await manager.close()
+    if kernel_pool:
+        await kernel_pool.close()
+
+app = FastAPI(lifespan=lifespan)
 socket_app = app # Alias for uvicorn
 
 # CORS
@@ -63,6 +102,7 @@ app.add_middleware(
 # --- 3. ENGINE INITIALIZATION ---
 print("🚀 VRYNDARA GATEWAY STARTING...")
 eng_service = None
+mesh_cache = None
 blender_engine = None
 coder_agent = None
 
@@ -70,31 +110,20 @@ try:
     if EngineeringService:
         # 1. Engineering Service (SDF Geometry)
         eng_service = EngineeringService(storage_manager=None)
+        # Shared with the kernel: identical SDF code is meshed once
+        mesh_cache = MeshCache(registry=artifacts)
         
         # 2. Blender Engine (Rendering)
         blender_engine = BlenderEngine()
         
         # 3. Code Generator (Mistral Brain)
-        # Check LINKED path first, then local models path
-        linked_model_path = project_root / "llama.cpp" / "models" / "mistral.gguf"
-        local_model_path = project_root / "models" / "mistral.gguf"
-        
-        final_model_path = None
-        if linked_model_path.exists():
-            final_model_path = linked_model_path
-            print(f"🧠 Found Brain (Linked): {final_model_path}")
-        elif local_model_path.exists():
-            final_model_path = local_model_path
-            print(f"🧠 Found Brain (Local): {final_model_path}")
-        
-        if final_model_path:
-            coder_agent = CodeGenerator(model_path=str(final_model_path))
-            print("✅ Engines Loaded (Mistral + Blender)")
+        # Served by llama.cpp through the shared LLM client, not loaded in-process
+        coder_agent = CodeGenerator()
+        backend = coder_agent.client.route(coder_agent.model)
+        if backend.health():
+            print(f"✅ Engines Loaded (Mistral via {backend.name} + Blender)")
         else:
-            print("⚠️ Mistral Model not found!")
-            print(f"   Checked: {linked_model_path}")
-            print(f"   Checked: {local_model_path}")
-            print("   (Engineering features will be disabled)")
+            print(f"⚠️ {backend.name} is not reachable yet; engineering requests will fail until it is.")
 except Exception as e:
     print(f"⚠️ Warning: Engines failed to load: {e}")
 
@@ -115,84 +144,105 @@ class RenderRequest(BaseModel):
     stl_path: str
 
 # --- 5. WEBSOCKET MANAGER ---
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
-
-manager = ConnectionManager()
+# Per-client queues and sender tasks: a slow dashboard never stalls the others
+manager = Broadcaster()
 
 # --- 6. API ROUTES ---
 
 # === ENGINEERING ENDPOINTS ===
 
+def _generate_geometry(job, prompt):
+    # A. Get Code from Mistral
+    generated_code = coder_agent.generate_code(prompt)
+    # B. Compile Geometry (cached by code)
+    result = mesh_cache.generate(eng_service, generated_code, description=prompt)
+    # C. Catalog the meshes under this job
+    registered = [
+        artifacts.register(path, MESH, job.id, source="gateway",
+                           metadata={"description": prompt[:200],
+                                     "cached": bool(isinstance(result, dict) and result.get("cached"))})
+        for path in mesh_files(result)
+    ]
+    return {"data": result, "code": generated_code, "artifacts": registered}
+
+def _render_artifact(job, stl_path):
+    output_dir = RENDER_ROOT / job.id
+    output_dir.mkdir(parents=True, exist_ok=True)
+    spec = {
+        "assets": [stl_path],
+        "quality": "high",
+        "description": "Web Render"
+    }
+    blender_engine.render_from_spec(spec, str(output_dir))
+
+    # Each job renders into its own folder, named by the job id
+    image = next(output_dir.glob("*.png"), None)
+    if image is None:
+        return {"image_path": None, "artifact": None}
+    artifact = artifacts.register(image, RENDER, job.id, source="gateway", metadata={"stl_path": stl_path})
+    return {"image_path": artifact["path"], "artifact": artifact}
+
+async def _run_job(kind, fn, *args, wait=True, description=""):
+    """Queues fn(job, *args) off the event loop; waits for it unless wait=False (202)."""
+    try:
+        job = job_runner.submit(kind, fn, *args, description=description, with_job=True)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=f"Engineering queue is full ({e}); retry shortly",
+                            headers={"Retry-After": "5"})
+    if not wait:
+        return JSONResponse(status_code=202, content={
+            "status": "queued", "job_id": job.id, "status_url": f"/api/engineer/jobs/{job.id}"
+        })
+    try:
+        result = await asyncio.wrap_future(job.future)
+    except Exception as e:
+        print(f"🔥 {kind.title()} Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "success", "job_id": job.id, **result}
+
 @app.post("/api/engineer/generate")
-async def generate_geometry(req: EngineeringRequest):
+async def generate_geometry(req: EngineeringRequest, wait: bool = True):
     if not coder_agent or not eng_service:
         raise HTTPException(status_code=503, detail="Engineering Engines not loaded. Check server logs.")
 
     print(f"🛠️ Processing Engineering Task: {req.prompt}")
-    
-    try:
-        # A. Get Code from Mistral
-        generated_code = coder_agent.generate_code(req.prompt)
-        
-        # B. Compile Geometry
-        result = eng_service.generate_sdf_from_code(generated_code)
-        
-        return {
-            "status": "success",
-            "data": result,
-            "code": generated_code
-        }
-    except Exception as e:
-        print(f"🔥 Engineering Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _run_job("generate", _generate_geometry, req.prompt, wait=wait, description=req.prompt)
 
 @app.post("/api/engineer/render")
-async def render_artifact(req: RenderRequest):
+async def render_artifact(req: RenderRequest, wait: bool = True):
     if not blender_engine:
         raise HTTPException(status_code=503, detail="Blender Engine not loaded")
 
     print(f"🎨 Rendering: {req.stl_path}")
-    
-    try:
-        # Define output directory
-        output_dir = project_root / "engineering_output" / "render_output"
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        spec = {
-            "assets": [req.stl_path],
-            "quality": "high",
-            "description": "Web Render"
-        }
-        
-        blender_engine.render_from_spec(spec, str(output_dir))
-        
-        # Find the newest image
-        files = sorted(output_dir.glob("*.png"), key=os.path.getmtime)
-        latest_image = str(files[-1]) if files else None
-        
-        return {
-            "status": "success",
-            "image_path": latest_image
-        }
-    except Exception as e:
-        print(f"🔥 Render Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _run_job("render", _render_artifact, req.stl_path, wait=wait, description=req.stl_path)
+
+@app.get("/api/engineer/jobs/{job_id}")
+async def get_engineering_job(job_id: str):
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+# === ARTIFACT ENDPOINTS ===
+
+@app.get("/api/v1/artifacts")
+async def list_artifacts(job_id: str = None, artifact_type: str = Query(None, alias="type"),
+                         limit: int = 50, offset: int = 0):
+    limit = max(1, min(limit, 500))
+    if job_id:
+        items = artifacts.by_job(job_id, artifact_type, limit, offset)
+    elif artifact_type:
+        items = artifacts.by_type(artifact_type, limit, offset)
+    else:
+        items = artifacts.recent(limit, offset)
+    return {"artifacts": items}
+
+@app.get("/api/v1/artifacts/{artifact_id}")
+async def get_artifact(artifact_id: str):
+    artifact = artifacts.get(artifact_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Unknown artifact")
+    return artifact
 
 
 # === WORKFLOW ENDPOINTS ===
@@ -203,39 +253,115 @@ async def create_workflow(req: WorkflowRequest):
         raise HTTPException(status_code=503, detail="gRPC Modules not loaded")
 
     print(f"📥 [Gateway] Received Workflow Request with {len(req.steps)} steps.")
-    
+
+    workflow_id = f"wf-{uuid.uuid4().hex[:12]}"
     try:
-        async with grpc.aio.insecure_channel('localhost:50051') as channel:
-            stub = vryndara_pb2_grpc.KernelStub(channel)
-            
-            proto_steps = [
-                vryndara_pb2.WorkflowStep(
-                    agent_id=s.agent_id,
-                    task_payload=s.task, 
-                    step_order=s.order
-                ) for s in req.steps
-            ]
-            
-            workflow_id = f"wf-{int(asyncio.get_event_loop().time())}"
-            
-            await stub.ExecuteWorkflow(vryndara_pb2.WorkflowRequest(
-                workflow_id=workflow_id,
-                steps=proto_steps
-            ))
-            
-            return {"status": "started", "id": workflow_id}
+        stub = kernel_pool.stub()
+
+        proto_steps = [
+            vryndara_pb2.WorkflowStep(
+                agent_id=s.agent_id,
+                task_payload=s.task,
+                step_order=s.order
+            ) for s in req.steps
+        ]
+
+        # Tracked before submitting, so no kernel signal can arrive first
+        workflow_tracker.create(workflow_id, req.steps)
+
+        # The kernel only accepts the workflow here; steps run in the background
+        ack = await stub.ExecuteWorkflow(vryndara_pb2.WorkflowRequest(
+            workflow_id=workflow_id,
+            steps=proto_steps
+        ))
+        if not ack.success:
+            workflow_tracker.fail(workflow_id, ack.error)
+            raise HTTPException(status_code=400, detail=ack.error)
 
+        return {
+            "status": "started",
+            "id": workflow_id,
+            "status_url": f"/api/v1/workflow/{workflow_id}",
+            "events_url": f"/api/v1/workflow/{workflow_id}/events",
+        }
+
+    except HTTPException:
+        raise
     except grpc.RpcError as e:
         print(f"🔥 [Gateway] gRPC Error: {e}")
+        workflow_tracker.fail(workflow_id, str(e.details()))
         raise HTTPException(status_code=500, detail=f"Kernel Connection Failed: {e.details()}")
     except Exception as e:
         print(f"🔥 [Gateway] Internal Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/workflow/{workflow_id}")
+async def get_workflow(workflow_id: str):
+    state = workflow_tracker.get(workflow_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Unknown workflow")
+    return state
+
+@app.get("/api/v1/workflow/{workflow_id}/events")
+async def workflow_events(workflow_id: str):
+    """Server-Sent Events: a snapshot, then step progress until the workflow ends."""
+    if workflow_tracker.get(workflow_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown workflow")
+    return StreamingResponse(
+        workflow_tracker.events(workflow_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# === VOICE ENDPOINTS ===
+
+# Base64 of this still fits the kernel channels' 64 MB message limit
+MAX_AUDIO_BYTES = 32 * 1024 * 1024
+
+@app.post("/api/v1/transcribe")
+async def transcribe_audio(request: Request):
+    """Raw audio body (wav, mp3, webm, ...) -> text, via the kernel's Whisper pool."""
+    if not vryndara_pb2_grpc:
+        raise HTTPException(status_code=503, detail="gRPC Modules not loaded")
+
+    audio = await request.body()
+    if not audio:
+        raise HTTPException(status_code=400, detail="Empty audio body")
+    if len(audio) > MAX_AUDIO_BYTES:
+        raise HTTPException(status_code=413, detail="Audio too large")
+
+    try:
+        ack = await kernel_pool.stub().Publish(vryndara_pb2.Signal(
+            id=f"stt-{time.time_ns()}",
+            source_agent_id="UI-Gateway",
+            target_agent_id="Transcriber",
+            type="TRANSCRIBE",
+            payload=json.dumps({
+                "audio": base64.b64encode(audio).decode("ascii"),
+                "prompt": request.query_params.get("prompt"),
+            }),
+            timestamp=int(time.time())
+        ))
+    except grpc.RpcError as e:
+        print(f"🔥 [Gateway] gRPC Error: {e}")
+        raise HTTPException(status_code=500, detail=f"Kernel Connection Failed: {e.details()}")
+
+    if not ack.success:
+        raise HTTPException(status_code=500, detail=ack.error)
+    return {"status": "success", "text": json.loads(ack.error)["text"]}
+
+@app.get("/api/v1/health/kernel")
+async def kernel_health():
+    if not kernel_pool:
+        raise HTTPException(status_code=503, detail="gRPC Modules not loaded")
+    health = kernel_pool.health()
+    health["status"] = "ok" if health["ready"] else "unreachable"
+    return health
+
 @app.post("/api/v1/progress")
 async def update_progress(data: dict):
     print(f"🔄 [Gateway] Progress Update: {data.get('agent_id')} - {data.get('status')}")
-    await manager.broadcast(data)
+    manager.broadcast(data)
     return {"status": "ok"}
 
 @app.websocket("/ws")
@@ -245,4 +371,6 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
\ No newline at end of file
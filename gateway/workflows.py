@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+TRACKER_ID = "Gateway-Tracker"
+MAX_FINISHED = 5000      # Finished workflows kept for status queries
+IDLE_TIMEOUT = 30 * 60   # Seconds without a signal before an unfinished workflow is failed as stale
+HEARTBEAT_INTERVAL = 15  # Seconds between SSE keepalive comments
+RECONNECT_DELAY = 2      # Seconds before re-subscribing after the kernel drops
+
+WORKFLOW_SIGNALS = ("WORKFLOW_START", "WORKFLOW_STEP", "WORKFLOW_COMPLETE")
+FINISHED = ("completed", "failed")
+
+
+class WorkflowTracker:
+    """
+    Gateway-side view of running workflows, fed by the kernel's WORKFLOW_*
+    signals. Holds per-step state and timings, and fans updates out to any
+    number of SSE listeners without keeping an HTTP request open per workflow.
+    Workflows the kernel goes quiet on (lost signals, kernel restart) are
+    failed as stale after idle_timeout, so they can be pruned like any other.
+    """
+
+    def __init__(self, max_finished=MAX_FINISHED, idle_timeout=IDLE_TIMEOUT):
+        self.max_finished = max_finished
+        self.idle_timeout = idle_timeout
+        self._workflows = OrderedDict()
+        self._listeners = {}
+
+    def create(self, workflow_id, steps):
+        self._workflows[workflow_id] = {
+            "id": workflow_id,
+            "status": "queued",
+            "submitted": time.time(),
+            "last_event": time.time(),
+            "started": None,
+            "finished": None,
+            "elapsed": None,
+            "steps": [
+                {"order": s.order, "agent_id": s.agent_id, "status": "pending",
+                 "started": None, "finished": None, "elapsed": None}
+                for s in sorted(steps, key=lambda s: s.order)
+            ],
+        }
+        self._prune()
+        return self._workflows[workflow_id]
+
+    def get(self, workflow_id):
+        state = self._workflows.get(workflow_id)
+        if state is not None:
+            self._expire(state, time.time())
+        return state
+
+    def fail(self, workflow_id, error):
+        state = self._workflows.get(workflow_id)
+        if state is not None:
+            state.update(status="failed", error=error, finished=time.time())
+            self._notify(workflow_id, {"event": "failed", "error": error})
+
+    def apply(self, signal_type, payload):
+        """Folds one kernel signal into the workflow's state."""
+        workflow_id = payload.get("workflow_id")
+        state = self._workflows.get(workflow_id)
+        if state is None:
+            return
+
+        state["last_event"] = time.time()
+        if signal_type == "WORKFLOW_START":
+            state.update(status="running", started=payload.get("started"))
+        elif signal_type == "WORKFLOW_STEP":
+            for step in state["steps"]:
+                if step["order"] == payload.get("order"):
+                    step.update({k: payload[k] for k in ("status", "started", "finished", "elapsed", "error")
+                                 if k in payload})
+                    break
+        elif signal_type == "WORKFLOW_COMPLETE":
+            state.update(status=payload.get("status", "completed"), finished=payload.get("finished"),
+                         elapsed=payload.get("elapsed"), error=payload.get("error", ""))
+        self._notify(workflow_id, dict(payload, event=signal_type))
+
+    def _expire(self, state, now):
+        if state["status"] not in FINISHED and now - state["last_event"] > self.idle_timeout:
+            self.fail(state["id"], f"stale: no workflow events for {self.idle_timeout / 60:g} min")
+
+    def _prune(self):
+        now = time.time()
+        for state in list(self._workflows.values()):
+            self._expire(state, now)
+        finished = [wid for wid, s in self._workflows.items() if s["status"] in FINISHED]
+        for wid in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._workflows[wid]
+
+    # --- SSE listeners ---
+    def listen(self, workflow_id):
+        queue = asyncio.Queue()
+        self._listeners.setdefault(workflow_id, set()).add(queue)
+        return queue
+
+    def unlisten(self, workflow_id, queue):
+        listeners = self._listeners.get(workflow_id)
+        if listeners is not None:
+            listeners.discard(queue)
+            if not listeners:
+                del self._listeners[workflow_id]
+
+    def _notify(self, workflow_id, event):
+        for queue in self._listeners.get(workflow_id, ()):
+            queue.put_nowait(event)
+
+    async def events(self, workflow_id):
+        """Async generator of SSE frames: a snapshot, then live updates until the workflow ends."""
+        queue = self.listen(workflow_id)
+        try:
+            state = self.get(workflow_id)
+            yield _sse("snapshot", state)
+            if state["status"] in FINISHED:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    self.get(workflow_id) # Fails it as stale (and queues that event) once idle too long
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event["event"], event)
+                if event["event"] in ("WORKFLOW_COMPLETE", "failed"):
+                    return
+        finally:
+            self.unlisten(workflow_id, queue)
+
+    # --- kernel feed ---
+    async def follow(self, kernel_pool, info):
+        """Subscribes to the kernel and applies WORKFLOW_* signals, reconnecting as needed."""
+        while True:
+            try:
+                async for signal in kernel_pool.stub().Subscribe(info):
+                    if signal.type in WORKFLOW_SIGNALS:
+                        self.apply(signal.type, json.loads(signal.payload or "{}"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ [Gateway] Workflow feed lost ({e}); resubscribing...")
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
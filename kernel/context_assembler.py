@@ -0,0 +1,112 @@
+import re
+
+# Tokens a single workflow step prompt may use (leave room for the reply)
+STEP_TOKEN_BUDGET = 3000
+# Memory gets at least this share of the space left after the task
+MEMORY_SHARE = 0.25
+# Overhead of the section headers
+HEADER_TOKENS = 16
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Cheap tokenizer-free estimate (~1.3 tokens per word or symbol)."""
+    if not text:
+        return 0
+    return int(len(_TOKEN_RE.findall(text)) * 1.3) + 1
+
+
+class AssembledContext:
+    def __init__(self, text, report):
+        self.text = text
+        self.report = report # Per-section token counts before/after trimming
+
+    @property
+    def trimmed_tokens(self):
+        return self.report["trimmed_tokens"]
+
+
+class ContextAssembler:
+    """
+    Builds workflow step prompts within a token budget.
+    The task is always kept; the previous result outranks memory context.
+    Oversized sections are summarized (if a summarizer is given) or trimmed.
+    """
+
+    def __init__(self, budget=STEP_TOKEN_BUDGET, count_tokens=estimate_tokens, summarize=None):
+        self.budget = budget
+        self.count_tokens = count_tokens
+        # Optional callable(text, max_tokens) -> shorter text
+        self.summarize = summarize
+
+    def _truncate(self, text, max_tokens, keep_tail=True):
+        """Cuts text to roughly max_tokens, keeping the head (and tail) intact."""
+        total = self.count_tokens(text)
+        if total <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+        chars_per_token = len(text) / total
+        keep_chars = int(max_tokens * chars_per_token)
+        marker = f"\n...[trimmed ~{total - max_tokens} tokens]...\n"
+        if not keep_tail:
+            return text[:keep_chars] + marker
+        head = int(keep_chars * 2 / 3)
+        tail = keep_chars - head
+        return text[:head] + marker + (text[-tail:] if tail > 0 else "")
+
+    def _fit_memory(self, memory, max_tokens):
+        """Drops the lowest-ranked memory entries first (they arrive best-first)."""
+        entries = memory.split(" | ")
+        while len(entries) > 1 and self.count_tokens(" | ".join(entries)) > max_tokens:
+            entries.pop()
+        return self._truncate(" | ".join(entries), max_tokens, keep_tail=False)
+
+    def _fit_previous(self, previous, max_tokens):
+        if self.summarize is not None and max_tokens > 0:
+            try:
+                summary = self.summarize(previous, max_tokens)
+                if summary and self.count_tokens(summary) <= max_tokens:
+                    return summary, True
+            except Exception:
+                pass
+        return self._truncate(previous, max_tokens), False
+
+    def assemble(self, task, memory="", previous=""):
+        task_tokens = self.count_tokens(task)
+        memory_tokens = self.count_tokens(memory)
+        previous_tokens = self.count_tokens(previous)
+
+        remaining = max(0, self.budget - task_tokens - HEADER_TOKENS)
+        summarized = False
+
+        if memory_tokens + previous_tokens <= remaining:
+            kept_memory, kept_previous = memory, previous
+        else:
+            memory_alloc = min(memory_tokens, max(remaining - previous_tokens, int(remaining * MEMORY_SHARE)))
+            previous_alloc = remaining - memory_alloc
+            kept_memory = self._fit_memory(memory, memory_alloc) if memory else memory
+            kept_previous = previous
+            if previous_tokens > previous_alloc:
+                kept_previous, summarized = self._fit_previous(previous, previous_alloc)
+
+        # Task last resort: only trimmed when it alone blows the budget
+        kept_task = self._truncate(task, self.budget - HEADER_TOKENS)
+
+        text = f"[MEMORY CONTEXT]: {kept_memory}\n\n[TASK]: {kept_task}"
+        if kept_previous:
+            text += f"\n\n[PREVIOUS RESULT]:\n{kept_previous}"
+
+        sections = {
+            "task": (task_tokens, self.count_tokens(kept_task)),
+            "memory": (memory_tokens, self.count_tokens(kept_memory)),
+            "previous": (previous_tokens, self.count_tokens(kept_previous)),
+        }
+        report = {
+            "budget": self.budget,
+            "sections": sections,
+            "trimmed_tokens": sum(max(0, before - after) for before, after in sections.values()),
+            "summarized": summarized,
+        }
+        return AssembledContext(text, report)
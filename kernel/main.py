@@ -5,6 +5,8 @@ import logging
 import grpc
 import time
 import json
+import base64
+import functools
 from concurrent import futures
 from threading import Thread
 
@@ -14,14 +16,19 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # --- KERNEL IMPORTS ---
 from protos import vryndara_pb2, vryndara_pb2_grpc
 from kernel.database import init_db, AsyncSessionLocal, EventLog
-from agents.coder.code_generator import CoderAgent
+from kernel.context_assembler import ContextAssembler
+from agents.coder.code_generator import CoderAgent, SDF_HEADER
 from Vryndara_Core.services.engineering_service import EngineeringService
 from sdk.python.vryndara.storage import StorageManager
+from sdk.python.vryndara.artifacts import ArtifactRegistry, MESH
 
 # --- JARVIS VOICE IMPORTS ---
 from Vryndara_Core.services.voice_engine import VoiceEngine
+from Vryndara_Core.services.voice_pipeline import VoicePipeline
 from Vryndara_Core.services.brain_service import BrainService
 from Vryndara_Core.services.director_skill import DirectorSkill
+from Vryndara_Core.services.transcription_service import TranscriptionService
+from Vryndara_Core.services.mesh_cache import MeshCache, mesh_files
 from colorama import Fore, init
 
 init(autoreset=True)
@@ -32,18 +39,46 @@ class VryndaraKernel(vryndara_pb2_grpc.KernelServicer):
         self.message_queues = {}
         self.registry = {}
         self.response_futures = {} 
+        self.agent_locks = {}
+        self.workflow_tasks = set() # Keeps running workflows from being garbage collected
 
         # --- SERVICES ---
-        self.storage = StorageManager(bucket_name="vryndara_output")
+        # Catalog of renders, meshes and uploads (shared with the gateway)
+        self.artifacts = ArtifactRegistry()
+        self.storage = StorageManager(bucket_name="vryndara_output", registry=self.artifacts)
         self.engineer = EngineeringService(self.storage)
+        # Identical SDF code is meshed once (shared with the gateway)
+        self.mesh_cache = MeshCache(registry=self.artifacts)
         
         # --- BRAIN (Shared with ChromaDB Memory) ---
         self.brain = BrainService() 
-        self.director = DirectorSkill(self.brain)
+        self.loop = asyncio.get_running_loop()
+        self.director = DirectorSkill(self.brain, on_render=self.notify_render, registry=self.artifacts)
+        # Keeps step prompts inside the model context however long results get
+        self.context_assembler = ContextAssembler()
         
+        # --- EARS (Shared Whisper pool: mic loop, gateway uploads, agents) ---
+        self.transcriber = TranscriptionService()
+
         # --- CODER (Specialized) ---
-        model_path = r"C:\Users\Mahantesh\DevelopmentProjects\VrindaAI\VrindaAI\llama.cpp\build\bin\Release\mistral.gguf"
-        self.coder = CoderAgent(model_path)
+        # Talks to the same llama.cpp core through the shared LLM client
+        self.coder = CoderAgent(client=self.brain.llm)
+
+    def notify_render(self, message, result):
+        """Director callback (pool thread): tells the UI a preview or final render is done."""
+        signal = vryndara_pb2.Signal(
+            id=f"render-{result.job_id}",
+            source_agent_id="Kernel-Orchestrator",
+            target_agent_id="UI-Gateway",
+            type="RENDER_COMPLETE" if result.final else "RENDER_PREVIEW",
+            payload=json.dumps({
+                "job_id": result.job_id, "tier": result.tier, "status": result.status, "message": message,
+                "image": getattr(result, "output", None), "elapsed": round(result.elapsed, 2),
+                "error": result.error
+            }),
+            timestamp=int(time.time())
+        )
+        asyncio.run_coroutine_threadsafe(self.Publish(signal, None), self.loop)
 
     async def Register(self, request, context):
         logging.info(f"Registering Agent: {request.id}")
@@ -54,7 +89,23 @@ class VryndaraKernel(vryndara_pb2_grpc.KernelServicer):
 
     async def Publish(self, request, context):
         target = request.target_agent_id
-        
+
+        # 0. TRANSCRIPTION: audio goes straight to the Whisper pool (not broadcast or logged)
+        if target == "Transcriber":
+            # Payload: {"audio": <base64 wav/mp3/...>, "prompt": optional} or bare base64
+            try:
+                try:
+                    job = json.loads(request.payload)
+                except ValueError:
+                    job = {"audio": request.payload}
+                audio = base64.b64decode(job["audio"])
+                logging.info(f"🎧 Transcription request from {request.source_agent_id} ({len(audio)} bytes)")
+                text = await asyncio.wrap_future(self.transcriber.submit(audio, initial_prompt=job.get("prompt")))
+                return vryndara_pb2.Ack(success=True, error=json.dumps({"text": text}))
+            except Exception as e:
+                logging.error(f"❌ Transcription Failed: {e}")
+                return vryndara_pb2.Ack(success=False, error=str(e))
+
         # 1. BROADCAST: Send to all subscribers (UI Bridge, etc.)
         for agent_id, queue in self.message_queues.items():
             if agent_id != request.source_agent_id:
@@ -89,10 +140,14 @@ class VryndaraKernel(vryndara_pb2_grpc.KernelServicer):
                 await self.Publish(thinking_signal, context)
 
                 generated_code = await loop.run_in_executor(None, self.coder.generate_sdf_code, request.payload)
-                full_code_context = f"from sdf import sphere, cylinder, union, difference, Z, slab, intersection, box, rounded_box, capsule, pi\n{generated_code}"
+                full_code_context = f"{SDF_HEADER}\n{generated_code}"
                 
-                result = await loop.run_in_executor(None, self.engineer.generate_sdf_from_code, full_code_context)
-                self.brain.store_memory(f"Generated SDF code for: {request.payload}", {"agent": "CoderAgent"})
+                result = await loop.run_in_executor(
+                    None, functools.partial(self.mesh_cache.generate, self.engineer, full_code_context,
+                                            description=request.payload)
+                )
+                await loop.run_in_executor(None, self._record_meshes, request.id, result, request.payload)
+                self.brain.store_memory(f"Generated SDF code for: {request.payload}", {"type": "engineering", "agent": "CoderAgent"})
                 
                 return vryndara_pb2.Ack(success=True, error=json.dumps(result))
             except Exception as e:
@@ -110,6 +165,15 @@ class VryndaraKernel(vryndara_pb2_grpc.KernelServicer):
         
         return vryndara_pb2.Ack(success=True)
 
+    def _record_meshes(self, job_id, result, description):
+        try:
+            for path in mesh_files(result):
+                self.artifacts.register(path, MESH, job_id, source="kernel",
+                                        metadata={"description": description[:200],
+                                                  "cached": bool(isinstance(result, dict) and result.get("cached"))})
+        except Exception as e:
+            logging.error(f"Artifact registry write failed: {e}")
+
     async def Subscribe(self, request, context):
         agent_id = request.id
         if agent_id not in self.message_queues:
@@ -119,49 +183,134 @@ class VryndaraKernel(vryndara_pb2_grpc.KernelServicer):
             yield await queue.get()
 
     async def ExecuteWorkflow(self, request, context):
+        """
+        Accepts a workflow and returns at once; steps run in a background task.
+        Progress goes out as WORKFLOW_START / WORKFLOW_STEP / WORKFLOW_COMPLETE signals.
+        """
+        if not request.steps:
+            return vryndara_pb2.Ack(success=False, error="Workflow has no steps")
+        task = asyncio.create_task(self._run_workflow(request))
+        self.workflow_tasks.add(task)
+        task.add_done_callback(self.workflow_tasks.discard)
+        return vryndara_pb2.Ack(success=True)
+
+    async def _workflow_signal(self, workflow_id, signal_type, suffix, **data):
+        signal = vryndara_pb2.Signal(
+            id=f"{workflow_id}-{suffix}",
+            source_agent_id="Kernel-Orchestrator",
+            target_agent_id="UI-Gateway",
+            type=signal_type,
+            payload=json.dumps(dict(data, workflow_id=workflow_id)),
+            timestamp=int(time.time())
+        )
+        await self.Publish(signal, None)
+
+    async def _run_workflow(self, request):
+        try:
+            await self._execute_workflow(request)
+        except Exception as e:
+            logging.error(f"❌ Workflow {request.workflow_id} crashed: {e}")
+            await self._workflow_signal(
+                request.workflow_id, "WORKFLOW_COMPLETE", "complete",
+                status="failed", error=str(e), finished=time.time()
+            )
+
+    async def _execute_workflow(self, request):
         workflow_id = request.workflow_id
         logging.info(f"🚀 Starting Smart Workflow: {workflow_id}")
         
         sorted_steps = sorted(request.steps, key=lambda s: s.step_order)
         previous_step_result = "" 
+        workflow_started = time.time()
+        failed_steps = []
+        await self._workflow_signal(
+            workflow_id, "WORKFLOW_START", "start", started=workflow_started,
+            steps=[{"order": s.step_order, "agent_id": s.agent_id} for s in sorted_steps]
+        )
 
-        for step in sorted_steps:
-            logging.info(f"▶️ Step {step.step_order}: Asking {step.agent_id}...")
-            
-            relevant_context = self.brain.retrieve_context(step.task_payload)
-            current_task = f"[MEMORY CONTEXT]: {relevant_context}\n\n[TASK]: {step.task_payload}"
-            
-            if previous_step_result:
-                current_task += f"\n\n[PREVIOUS RESULT]:\n{previous_step_result}"
+        # Prefetch durable facts for every step in one round trip.
+        # No chat history in agent prompts: episodic memory is scoped per step below.
+        loop = asyncio.get_running_loop()
+        facts_contexts = await loop.run_in_executor(
+            None, functools.partial(self.brain.retrieve_contexts, tiers=("facts",)),
+            [s.task_payload for s in sorted_steps]
+        )
 
-            loop = asyncio.get_running_loop()
-            result_future = loop.create_future()
-            self.response_futures[step.agent_id] = result_future
+        for step, facts_context in zip(sorted_steps, facts_contexts):
+            logging.info(f"▶️ Step {step.step_order}: Asking {step.agent_id}...")
 
-            signal = vryndara_pb2.Signal(
-                id=f"{workflow_id}-{step.step_order}", 
-                source_agent_id="Kernel-Orchestrator",
-                target_agent_id=step.agent_id, 
-                type="TASK_REQUEST", 
-                payload=current_task, 
-                timestamp=int(time.time())
+            # Earlier results from this workflow and from the agent's past runs
+            relevant_context = await loop.run_in_executor(
+                None, functools.partial(
+                    self.brain.retrieve_workflow_context, step.task_payload,
+                    workflow=workflow_id, agent=step.agent_id, facts_context=facts_context
+                )
             )
-            await self.Publish(signal, context)
-            
-            try:
-                result_payload = await asyncio.wait_for(result_future, timeout=300.0)
-                self.brain.store_memory(
-                    text=f"Step {step.step_order} Result: {result_payload}",
-                    metadata={"workflow": workflow_id, "agent": step.agent_id}
+
+            assembled = self.context_assembler.assemble(step.task_payload, relevant_context, previous_step_result)
+            current_task = assembled.text
+            if assembled.trimmed_tokens:
+                sections = assembled.report["sections"]
+                logging.info(
+                    f"✂️ Step {step.step_order}: trimmed ~{assembled.trimmed_tokens} tokens "
+                    f"(memory {sections['memory'][0]}→{sections['memory'][1]}, "
+                    f"previous {sections['previous'][0]}→{sections['previous'][1]})"
                 )
-                previous_step_result = result_payload 
-            except asyncio.TimeoutError:
-                logging.error(f"❌ Step {step.step_order} Timed Out!")
-            finally:
-                if step.agent_id in self.response_futures:
-                    del self.response_futures[step.agent_id]
 
-        return vryndara_pb2.Ack(success=True)
+            # Agents reply by source id only, so one workflow at a time may talk to each agent
+            async with self.agent_locks.setdefault(step.agent_id, asyncio.Lock()):
+                step_started = time.time()
+                await self._workflow_signal(
+                    workflow_id, "WORKFLOW_STEP", f"step{step.step_order}-running",
+                    order=step.step_order, agent_id=step.agent_id, status="running", started=step_started
+                )
+
+                result_future = loop.create_future()
+                self.response_futures[step.agent_id] = result_future
+
+                signal = vryndara_pb2.Signal(
+                    id=f"{workflow_id}-{step.step_order}", 
+                    source_agent_id="Kernel-Orchestrator",
+                    target_agent_id=step.agent_id, 
+                    type="TASK_REQUEST", 
+                    payload=current_task, 
+                    timestamp=int(time.time())
+                )
+                await self.Publish(signal, None)
+                
+                status, error = "completed", ""
+                try:
+                    result_payload = await asyncio.wait_for(result_future, timeout=300.0)
+                    self.brain.store_memory(
+                        text=f"Step {step.step_order} Result: {result_payload}",
+                        metadata={
+                            "type": "workflow_result", "workflow": workflow_id, "agent": step.agent_id,
+                            "context_trimmed_tokens": assembled.trimmed_tokens
+                        }
+                    )
+                    previous_step_result = result_payload 
+                except asyncio.TimeoutError:
+                    logging.error(f"❌ Step {step.step_order} Timed Out!")
+                    status, error = "timeout", "No result within 300s"
+                    failed_steps.append(step.step_order)
+                finally:
+                    if step.agent_id in self.response_futures:
+                        del self.response_futures[step.agent_id]
+
+            step_finished = time.time()
+            await self._workflow_signal(
+                workflow_id, "WORKFLOW_STEP", f"step{step.step_order}-{status}",
+                order=step.step_order, agent_id=step.agent_id, status=status, error=error,
+                started=step_started, finished=step_finished, elapsed=round(step_finished - step_started, 3)
+            )
+
+        finished = time.time()
+        await self._workflow_signal(
+            workflow_id, "WORKFLOW_COMPLETE", "complete",
+            status="failed" if failed_steps else "completed", failed_steps=failed_steps,
+            finished=finished, elapsed=round(finished - workflow_started, 3)
+        )
+        logging.info(f"🏁 Workflow {workflow_id} finished in {finished - workflow_started:.1f}s")
 
 # --- SENSOR GATEWAY ---
 def sensor_gateway_loop(kernel_instance, main_loop):
@@ -189,60 +338,69 @@ def sensor_gateway_loop(kernel_instance, main_loop):
 
 # --- VOICE LOOP ---
 def jarvis_voice_loop(kernel_instance, main_loop):
+    """
+    Capture, reasoning and playback run as concurrent pipeline stages:
+    the mic stays live while Vryndara thinks and speaks, and talking over
+    her cancels the reply in flight (LLM generation and TTS).
+    """
     print(f"{Fore.GREEN}🎙️ Initializing Voice Systems...")
-    voice = VoiceEngine()
-    brain = kernel_instance.brain 
-    
-    while True:
-        try:
-            user_text = input(f"{Fore.CYAN}⌨️ Command: ")
-            if not user_text.strip():
-                user_text = voice.listen()
-            
-            if not user_text: continue
-
-            # Vision Controls
-            if "activate vision" in user_text.lower():
-                import subprocess
-                subprocess.Popen('start cmd.exe /c "conda activate vryndara && python Vryndara_Core/services/vision_service.py"', shell=True)
-                voice.speak("Eyes online.")
-                continue
-
-            # --- THINKING SIGNAL BROADCAST ---
-            thinking_signal = vryndara_pb2.Signal(
-                id=f"voice-think-{int(time.time())}",
-                source_agent_id="Kernel-Orchestrator",
-                target_agent_id="UI-Gateway",
-                type="MEMORY_RETRIEVAL", # Triggers Purple Color
-                payload=json.dumps({"status": "thinking"}),
-                timestamp=int(time.time())
-            )
-            asyncio.run_coroutine_threadsafe(kernel_instance.Publish(thinking_signal, None), main_loop)
-
-            # Chat Logic (Heavy processing)
-            response = brain.think(user_text)
-
-            # --- IDLE SIGNAL BROADCAST ---
-            idle_signal = vryndara_pb2.Signal(
-                id=f"voice-idle-{int(time.time())}",
-                source_agent_id="Kernel-Orchestrator",
-                target_agent_id="UI-Gateway",
-                type="IDLE", # Returns to Blue
-                payload="{}",
-                timestamp=int(time.time())
-            )
-            asyncio.run_coroutine_threadsafe(kernel_instance.Publish(idle_signal, None), main_loop)
+    voice = VoiceEngine(transcriber=kernel_instance.transcriber)
+    brain = kernel_instance.brain
 
-            voice.speak(response)
-            
-        except Exception as e:
-            logging.error(f"Voice Error: {e}")
+    def publish_state(state):
+        # thinking -> Purple (MEMORY_RETRIEVAL), idle -> Blue
+        signal_type = {"thinking": "MEMORY_RETRIEVAL", "idle": "IDLE"}.get(state)
+        if signal_type is None:
+            return
+        signal = vryndara_pb2.Signal(
+            id=f"voice-{state}-{int(time.time())}",
+            source_agent_id="Kernel-Orchestrator",
+            target_agent_id="UI-Gateway",
+            type=signal_type,
+            payload=json.dumps({"status": state}) if state == "thinking" else "{}",
+            timestamp=int(time.time())
+        )
+        asyncio.run_coroutine_threadsafe(kernel_instance.Publish(signal, None), main_loop)
+
+    def keyboard(pipeline):
+        # Optional second source: typed commands go through the same queue as speech
+        while True:
+            try:
+                pipeline.submit(input(f"{Fore.CYAN}⌨️ Command: "))
+            except EOFError:
+                return
+
+    def respond(user_text, cancel):
+        # Vision Controls
+        if "activate vision" in user_text.lower():
+            import subprocess
+            subprocess.Popen('start cmd.exe /c "conda activate vryndara && python Vryndara_Core/services/vision_service.py"', shell=True)
+            return "Eyes online."
+
+        # Chat Logic: streamed, so speech starts with the first sentence
+        return brain.think_stream(user_text, cancel=cancel)
+
+    # The mic is always live (VAD-driven listen), so speech during a reply barges in
+    pipeline = VoicePipeline(voice, respond, on_state=publish_state).start()
+    # Without a mic model, listen() itself reads the keyboard
+    has_ears = voice.model is not None or voice.transcriber is not None
+    if has_ears and sys.stdin is not None and sys.stdin.isatty():
+        Thread(target=keyboard, args=(pipeline,), name="voice-keyboard", daemon=True).start()
 
 # --- STARTUP ---
 async def serve():
     await init_db()
     kernel_service = VryndaraKernel()
-    server = grpc.aio.server(futures.ThreadPoolExecutor(max_workers=10))
+    server = grpc.aio.server(
+        futures.ThreadPoolExecutor(max_workers=10),
+        options=[
+            # Transcriber uploads carry base64 audio
+            ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+            # Accept the gateway's keepalive pings on idle pooled channels
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.min_ping_interval_without_data_ms", 20000),
+        ]
+    )
     vryndara_pb2_grpc.add_KernelServicer_to_server(kernel_service, server)
     server.add_insecure_port('[::]:50051')
     
@@ -254,7 +412,12 @@ async def serve():
     Thread(target=sensor_gateway_loop, args=(kernel_service, main_loop), daemon=True).start()
     
     logging.info("✅ Kernel & Jarvis are Live.")
-    await server.wait_for_termination()
+    try:
+        await server.wait_for_termination()
+    finally:
+        # Don't lose memories still sitting in the write queue
+        kernel_service.brain.close()
+        kernel_service.transcriber.shutdown()
 
 if __name__ == '__main__':
     if sys.platform == 'win32':
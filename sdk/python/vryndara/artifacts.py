@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+ARTIFACT_DB = os.environ.get("VRYNDARA_ARTIFACT_DB", os.path.join(PROJECT_ROOT, "artifacts.db"))
+
+# Artifact types used across Vryndara
+RENDER = "render"
+RENDER_PREVIEW = "render_preview"
+MESH = "mesh"
+SCRIPT = "script"
+MEDIA = "media"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    path TEXT, -- NULL once the local file is gone; storage_url is then the location
+    content_hash TEXT,
+    size INTEGER,
+    storage_url TEXT,
+    source TEXT,
+    metadata TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_job ON artifacts (job_id);
+CREATE INDEX IF NOT EXISTS idx_artifacts_type ON artifacts (type, created);
+CREATE INDEX IF NOT EXISTS idx_artifacts_hash ON artifacts (content_hash);
+CREATE INDEX IF NOT EXISTS idx_artifacts_path ON artifacts (path);
+"""
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactRegistry:
+    """
+    One SQLite catalog of everything Vryndara produces: Director renders,
+    engineering meshes, and MinIO uploads. Artifacts are recorded when they
+    are written, so finding a job's output is an indexed lookup instead of a
+    directory scan. Safe to share between threads and processes (WAL mode).
+    """
+
+    def __init__(self, db_path=ARTIFACT_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        data = dict(row)
+        data["metadata"] = json.loads(data["metadata"] or "{}")
+        return data
+
+    def register(self, path, artifact_type, job_id, storage_url=None, source=None, metadata=None):
+        """Records a produced file and returns its artifact dict."""
+        path = os.path.abspath(path)
+        artifact = {
+            "id": f"art-{uuid.uuid4().hex[:12]}",
+            "job_id": job_id,
+            "type": artifact_type,
+            "path": path,
+            "content_hash": file_hash(path),
+            "size": os.path.getsize(path),
+            "storage_url": storage_url,
+            "source": source,
+            "metadata": json.dumps(metadata or {}),
+            "created": time.time(),
+        }
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO artifacts (id, job_id, type, path, content_hash, size, storage_url, source, metadata, created) "
+                "VALUES (:id, :job_id, :type, :path, :content_hash, :size, :storage_url, :source, :metadata, :created)",
+                artifact
+            )
+        artifact["metadata"] = metadata or {}
+        return artifact
+
+    def set_storage_url(self, path, storage_url):
+        """Attaches an upload URL to every artifact recorded for this file."""
+        with self._conn() as conn:
+            cursor = conn.execute("UPDATE artifacts SET storage_url = ? WHERE path = ?",
+                                  (storage_url, os.path.abspath(path)))
+        return cursor.rowcount
+
+    def forget_path(self, path):
+        """
+        The local file is gone (evicted, or deleted after upload): its rows keep
+        their hash, size and storage URL but no longer point at the disk.
+        """
+        with self._conn() as conn:
+            cursor = conn.execute("UPDATE artifacts SET path = NULL WHERE path = ?", (os.path.abspath(path),))
+        return cursor.rowcount
+
+    # --- QUERIES ---
+    def get(self, artifact_id):
+        row = self._conn().execute("SELECT * FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+        return self._row(row)
+
+    def by_job(self, job_id, artifact_type=None, limit=None, offset=0):
+        sql, args = "SELECT * FROM artifacts WHERE job_id = ?", [job_id]
+        if artifact_type:
+            sql += " AND type = ?"
+            args.append(artifact_type)
+        sql += " ORDER BY created LIMIT ? OFFSET ?"
+        args += [-1 if limit is None else limit, offset]
+        rows = self._conn().execute(sql, args).fetchall()
+        return [self._row(r) for r in rows]
+
+    def latest(self, job_id, artifact_type=None):
+        sql, args = "SELECT * FROM artifacts WHERE job_id = ?", [job_id]
+        if artifact_type:
+            sql += " AND type = ?"
+            args.append(artifact_type)
+        row = self._conn().execute(sql + " ORDER BY created DESC LIMIT 1", args).fetchone()
+        return self._row(row)
+
+    def by_type(self, artifact_type, limit=50, offset=0):
+        rows = self._conn().execute(
+            "SELECT * FROM artifacts WHERE type = ? ORDER BY created DESC LIMIT ? OFFSET ?",
+            (artifact_type, limit, offset)
+        ).fetchall()
+        return [self._row(r) for r in rows]
+
+    def by_hash(self, content_hash):
+        rows = self._conn().execute(
+            "SELECT * FROM artifacts WHERE content_hash = ? ORDER BY created", (content_hash,)
+        ).fetchall()
+        return [self._row(r) for r in rows]
+
+    def recent(self, limit=50, offset=0):
+        rows = self._conn().execute(
+            "SELECT * FROM artifacts ORDER BY created DESC LIMIT ? OFFSET ?", (limit, offset)
+        ).fetchall()
+        return [self._row(r) for r in rows]
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def default_registry():
+    """Process-wide registry on the shared catalog file."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ArtifactRegistry()
+        return _default_registry
@@ -0,0 +1,406 @@
+import heapq
+import itertools
+from abc import ABC, abstractmethod
+import json
+import os
+import threading
+import time
+
+import requests
+
+# --- PRIORITIES (lower runs first) ---
+PRIORITY_INTERACTIVE = 0 # Voice / chat replies a human is waiting on
+PRIORITY_NORMAL = 5      # Director, agents, workflow steps
+PRIORITY_BACKGROUND = 9  # Memory compaction and other housekeeping
+
+# --- DEFAULT BACKENDS (override via environment) ---
+LLAMA_URL = os.environ.get("VRYNDARA_LLAMA_URL", "http://127.0.0.1:8080")
+LLAMA_MODEL = os.environ.get("VRYNDARA_LLAMA_MODEL", "mistral")
+LLAMA_SLOTS = int(os.environ.get("VRYNDARA_LLAMA_SLOTS", "4")) # Match llama-server -np
+OLLAMA_URL = os.environ.get("VRYNDARA_OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.environ.get("VRYNDARA_OLLAMA_MODEL", "llama3.1:8b")
+OLLAMA_CONCURRENCY = int(os.environ.get("VRYNDARA_OLLAMA_CONCURRENCY", "1"))
+REQUEST_TIMEOUT = 300
+
+
+class LLMError(Exception):
+    """Raised when a backend rejects a request or cannot be reached."""
+
+    def __init__(self, message, status=None, backend=None):
+        super().__init__(message)
+        self.status = status
+        self.backend = backend
+
+
+class LLMCancelled(LLMError):
+    """Raised inside a stream when its cancel event was set."""
+
+
+class LLMResult:
+    def __init__(self, text, backend, model, queue_wait, elapsed):
+        self.text = text
+        self.backend = backend
+        self.model = model
+        self.queue_wait = queue_wait # Seconds spent waiting for a backend slot
+        self.elapsed = elapsed       # Seconds spent generating
+
+    def __str__(self):
+        return self.text
+
+
+def messages_to_prompt(messages):
+    """Renders chat messages in the Mistral/Llama format used by the llama.cpp core."""
+    parts = [f"<|{m['role']}|>\n{m['content']}" for m in messages]
+    return "\n".join(parts) + "\n<|assistant|>\n"
+
+
+class _Admission:
+    """Priority-ordered gate that lets at most `limit` requests run at once."""
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        self.running = 0
+        self._waiting = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    @property
+    def waiting(self):
+        return len(self._waiting)
+
+    def acquire(self, priority, timeout=None):
+        ticket = (priority, next(self._order))
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while self.running >= self.limit or self._waiting[0] != ticket:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                    return False
+                self._cond.wait(remaining)
+            heapq.heappop(self._waiting)
+            self.running += 1
+            # The next ticket may also fit under the limit
+            self._cond.notify_all()
+            return True
+
+    def release(self):
+        with self._cond:
+            self.running -= 1
+            self._cond.notify_all()
+
+
+class Backend(ABC):
+    """Base class: a model server with its own concurrency cap."""
+
+    def __init__(self, name, models, max_concurrency=1):
+        self.name = name
+        self.models = set(models)
+        self.admission = _Admission(max_concurrency)
+        self.stats = {"requests": 0, "errors": 0, "queue_wait": 0.0, "elapsed": 0.0}
+
+    def serves(self, model):
+        return model in self.models or "*" in self.models
+
+    def load(self):
+        return (self.admission.running + self.admission.waiting) / self.admission.limit
+
+    @abstractmethod
+    def complete(self, model, messages, options):
+        """Returns the full reply text."""
+
+    def stream(self, model, messages, options, cancel=None):
+        """Yields text fragments. Backends without streaming yield one fragment."""
+        yield self.complete(model, messages, options)
+
+    def health(self):
+        return True
+
+
+class LlamaCppBackend(Backend):
+    """
+    llama.cpp server (/completion).
+    Callers may pin an `id_slot` to keep their cached prompt prefix; a slot the
+    server doesn't have is sent as -1 (any free slot) instead.
+    """
+
+    def __init__(self, url=LLAMA_URL, models=(LLAMA_MODEL,), max_concurrency=LLAMA_SLOTS, name="llama.cpp",
+                 slots=None):
+        super().__init__(name, models, max_concurrency)
+        self.url = url.rstrip("/")
+        self.slots = slots # Server slot count; None = read /props on first use
+
+    def total_slots(self):
+        """Slots the server was started with (-np), from /props, else VRYNDARA_LLAMA_SLOTS."""
+        if self.slots is None:
+            try:
+                self.slots = int(requests.get(f"{self.url}/props", timeout=2).json()["total_slots"])
+            except (requests.RequestException, ValueError, KeyError, TypeError):
+                return LLAMA_SLOTS # Not cached: the server may just not be up yet
+        return self.slots
+
+    def _payload(self, messages, options):
+        payload = {
+            "prompt": options.pop("prompt", None) or messages_to_prompt(messages),
+            "n_predict": options.pop("max_tokens", 512),
+            "stop": ["<|user|>", "\nUser:"],
+            "cache_prompt": True,
+        }
+        payload.update(options)
+        slot = payload.get("id_slot")
+        if slot is not None and slot >= self.total_slots():
+            payload["id_slot"] = -1
+        return payload
+
+    def _post(self, payload, stream=False):
+        try:
+            return self._send(payload, stream)
+        except LLMError as e:
+            if e.status is None or payload.get("id_slot", -1) < 0:
+                raise
+            # The server refused the pinned slot: fall back to the shared pool once
+            print(f"⚠️ [LLM] {self.name} rejected slot {payload['id_slot']} ({e.status}); retrying on any slot.")
+            return self._send(dict(payload, id_slot=-1), stream)
+
+    def _send(self, payload, stream=False):
+        try:
+            response = requests.post(f"{self.url}/completion", json=payload, timeout=REQUEST_TIMEOUT, stream=stream)
+        except requests.RequestException as e:
+            raise LLMError(str(e), backend=self.name)
+        if response.status_code != 200:
+            response.close()
+            raise LLMError(f"{self.name} returned {response.status_code}", response.status_code, self.name)
+        return response
+
+    def complete(self, model, messages, options):
+        return self._post(self._payload(messages, options)).json().get("content", "").strip()
+
+    def stream(self, model, messages, options, cancel=None):
+        payload = self._payload(messages, options)
+        payload["stream"] = True
+        response = self._post(payload, stream=True)
+        # Closing the connection makes llama-server stop generating for this slot
+        with response:
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if cancel is not None and cancel.is_set():
+                        raise LLMCancelled("Generation cancelled", backend=self.name)
+                    if not line or not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[len("data: "):])
+                    if event.get("content"):
+                        yield event["content"]
+                    if event.get("stop"):
+                        return
+            except requests.RequestException as e:
+                raise LLMError(str(e), backend=self.name)
+
+    def health(self):
+        try:
+            return requests.get(f"{self.url}/health", timeout=2).status_code == 200
+        except requests.RequestException:
+            return False
+
+
+class OllamaBackend(Backend):
+    """Ollama server (/api/chat)."""
+
+    def __init__(self, url=OLLAMA_URL, models=(OLLAMA_MODEL,), max_concurrency=OLLAMA_CONCURRENCY, name="ollama"):
+        super().__init__(name, models, max_concurrency)
+        self.url = url.rstrip("/")
+
+    def _post(self, model, messages, options, stream):
+        options.pop("prompt", None)
+        options.pop("id_slot", None)
+        if "max_tokens" in options:
+            options["num_predict"] = options.pop("max_tokens")
+        payload = {"model": model, "messages": messages, "stream": stream, "options": options}
+        try:
+            response = requests.post(f"{self.url}/api/chat", json=payload, timeout=REQUEST_TIMEOUT, stream=stream)
+        except requests.RequestException as e:
+            raise LLMError(str(e), backend=self.name)
+        if response.status_code != 200:
+            response.close()
+            raise LLMError(f"{self.name} returned {response.status_code}", response.status_code, self.name)
+        return response
+
+    def complete(self, model, messages, options):
+        return self._post(model, messages, options, stream=False).json()["message"]["content"]
+
+    def stream(self, model, messages, options, cancel=None):
+        response = self._post(model, messages, options, stream=True)
+        with response:
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if cancel is not None and cancel.is_set():
+                        raise LLMCancelled("Generation cancelled", backend=self.name)
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    content = (event.get("message") or {}).get("content")
+                    if content:
+                        yield content
+                    if event.get("done"):
+                        return
+            except requests.RequestException as e:
+                raise LLMError(str(e), backend=self.name)
+
+    def health(self):
+        try:
+            return requests.get(f"{self.url}/api/tags", timeout=2).status_code == 200
+        except requests.RequestException:
+            return False
+
+
+class FakeBackend(Backend):
+    """
+    In-process stand-in for tests and offline runs.
+    `reply` is a string or a callable(model, messages) -> str.
+    """
+
+    def __init__(self, reply="OK", latency=0.0, models=("*",), max_concurrency=4, name="fake"):
+        super().__init__(name, models, max_concurrency)
+        self.reply = reply
+        self.latency = latency
+        self.calls = []
+
+    def complete(self, model, messages, options):
+        self.calls.append((model, messages, dict(options)))
+        if self.latency:
+            time.sleep(self.latency)
+        return self.reply(model, messages) if callable(self.reply) else self.reply
+
+    def stream(self, model, messages, options, cancel=None):
+        words = self.complete(model, messages, options).split(" ")
+        for i, word in enumerate(words):
+            if cancel is not None and cancel.is_set():
+                raise LLMCancelled("Generation cancelled", backend=self.name)
+            yield word if i == 0 else " " + word
+
+
+class LLMClient:
+    """
+    Single entry point for every LLM call in Vryndara.
+    Routes each request to the least-loaded backend serving the model and
+    queues it by priority behind that backend's concurrency cap.
+    """
+
+    def __init__(self, backends=None, default_model=None):
+        self.backends = list(backends or [])
+        self.default_model = default_model
+        self._lock = threading.Lock()
+
+    def add_backend(self, backend):
+        with self._lock:
+            self.backends.append(backend)
+
+    def route(self, model):
+        candidates = [b for b in self.backends if b.serves(model)]
+        if not candidates:
+            raise LLMError(f"No backend serves model '{model}'")
+        return min(candidates, key=lambda b: b.load())
+
+    def generate(self, prompt=None, messages=None, system=None, model=None,
+                 priority=PRIORITY_NORMAL, queue_timeout=None, **options):
+        """
+        Runs one completion and returns an LLMResult.
+        Pass either `messages` (chat format) or `prompt` (+ optional `system`).
+        A raw, pre-formatted prompt can be forwarded to llama.cpp via raw_prompt=...
+        """
+        model, messages = self._prepare(prompt, messages, system, model, options)
+        backend, queued_at = self.route(model), time.time()
+        started = self._admit(backend, priority, queue_timeout)
+        try:
+            text = backend.complete(model, messages, dict(options))
+        except Exception:
+            backend.stats["errors"] += 1
+            raise
+        finally:
+            backend.admission.release()
+            backend.stats["requests"] += 1
+            backend.stats["queue_wait"] += started - queued_at
+            backend.stats["elapsed"] += time.time() - started
+
+        return LLMResult(text, backend.name, model, started - queued_at, time.time() - started)
+
+    def stream(self, prompt=None, messages=None, system=None, model=None,
+               priority=PRIORITY_NORMAL, queue_timeout=None, cancel=None, **options):
+        """
+        Like generate(), but yields text fragments as the backend produces them.
+        Setting the `cancel` event (threading.Event) stops generation on the
+        server and raises LLMCancelled; the backend slot is freed either way.
+        """
+        model, messages = self._prepare(prompt, messages, system, model, options)
+        backend, queued_at = self.route(model), time.time()
+        started = self._admit(backend, priority, queue_timeout)
+        try:
+            if cancel is not None and cancel.is_set():
+                raise LLMCancelled("Generation cancelled", backend=backend.name)
+            yield from backend.stream(model, messages, dict(options), cancel)
+        except LLMCancelled:
+            raise
+        except Exception:
+            backend.stats["errors"] += 1
+            raise
+        finally:
+            backend.admission.release()
+            backend.stats["requests"] += 1
+            backend.stats["queue_wait"] += started - queued_at
+            backend.stats["elapsed"] += time.time() - started
+
+    def _prepare(self, prompt, messages, system, model, options):
+        model = model or self.default_model
+        if messages is None:
+            messages = []
+            if system:
+                messages.append({"role": "system", "content": system})
+            messages.append({"role": "user", "content": prompt or ""})
+        if "raw_prompt" in options:
+            options["prompt"] = options.pop("raw_prompt")
+        return model, messages
+
+    def _admit(self, backend, priority, queue_timeout):
+        if not backend.admission.acquire(priority, queue_timeout):
+            raise LLMError(f"Timed out waiting for {backend.name}", status=429, backend=backend.name)
+        return time.time()
+
+    def chat(self, messages, model=None, priority=PRIORITY_NORMAL, **options):
+        return self.generate(messages=messages, model=model, priority=priority, **options)
+
+    def snapshot(self):
+        """Per-backend load and average queue wait, for logs and dashboards."""
+        data = {}
+        for b in self.backends:
+            requests_done = b.stats["requests"] or 1
+            data[b.name] = {
+                "running": b.admission.running,
+                "queued": b.admission.waiting,
+                "limit": b.admission.limit,
+                "requests": b.stats["requests"],
+                "errors": b.stats["errors"],
+                "avg_queue_wait": round(b.stats["queue_wait"] / requests_done, 3),
+                "avg_elapsed": round(b.stats["elapsed"] / requests_done, 3),
+            }
+        return data
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """
+    Process-wide client. Set VRYNDARA_LLM_BACKEND=fake to run without any model server.
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            if os.environ.get("VRYNDARA_LLM_BACKEND") == "fake":
+                backends = [FakeBackend()]
+            else:
+                backends = [LlamaCppBackend(), OllamaBackend()]
+            _default_client = LLMClient(backends, default_model=LLAMA_MODEL)
+        return _default_client
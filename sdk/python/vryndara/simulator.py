@@ -0,0 +1,297 @@
+"""
+Offline stand-ins for the LLM servers and web search.
+
+    python -m sdk.python.vryndara.simulator --tps 25 --ttft 0.4 --fail 0.05
+
+serves the llama.cpp API on :8080 and the Ollama API on :11434, so the kernel,
+gateway and agents run unchanged. Set VRYNDARA_SEARCH=sim for the researcher;
+VRYNDARA_SIM_SEARCH_LATENCY and VRYNDARA_SIM_SEARCH_FAIL tune the fake search.
+
+Like llama-server with `cache_prompt`, each of the --slots slots keeps its last
+prompt: a request that shares a prefix with it only pays first-token latency
+for the new part.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SEARCH_LATENCY = float(os.environ.get("VRYNDARA_SIM_SEARCH_LATENCY", "0.5")) # Seconds per query
+SEARCH_FAILURE_RATE = float(os.environ.get("VRYNDARA_SIM_SEARCH_FAIL", "0.0")) # Fraction of queries that raise
+
+FILLER = (
+    "the system processed the request and produced a concise answer covering "
+    "structure timing materials cost risks and next steps for the project"
+).split()
+
+
+class SimulatorConfig:
+    def __init__(self, tokens_per_second=30.0, first_token_latency=0.3, reply_tokens=64,
+                 failure_rate=0.0, failure_status=503, drop_rate=0.0, model="llama3.1:8b", seed=None,
+                 slots=4):
+        self.tokens_per_second = tokens_per_second
+        self.first_token_latency = first_token_latency # Prompt-eval time before the first token
+        self.reply_tokens = reply_tokens               # Upper bound; n_predict may lower it
+        self.failure_rate = failure_rate               # Fraction answered with failure_status
+        self.failure_status = failure_status
+        self.drop_rate = drop_rate                     # Fraction closed without any response
+        self.model = model
+        self.slot_prompts = [""] * slots               # Prompt each llama slot last evaluated
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "failures": 0, "drops": 0, "cancelled": 0, "tokens": 0,
+                      "cached_chars": 0}
+
+    def roll(self):
+        """Decides the fate of one request: 'ok', 'fail' or 'drop'."""
+        with self.lock:
+            self.stats["requests"] += 1
+            r = self.random.random()
+            if r < self.drop_rate:
+                self.stats["drops"] += 1
+                return "drop"
+            if r < self.drop_rate + self.failure_rate:
+                self.stats["failures"] += 1
+                return "fail"
+            return "ok"
+
+    def prompt_latency(self, prompt, slot=-1, cache_prompt=False):
+        """
+        First-token latency for a llama prompt. With cache_prompt the chosen slot
+        (or, for -1, the slot sharing the longest prefix) only re-evaluates the
+        part of the prompt it hasn't seen.
+        """
+        if not cache_prompt or not prompt:
+            return self.first_token_latency
+        with self.lock:
+            if slot < 0:
+                slot = max(range(len(self.slot_prompts)),
+                           key=lambda i: _shared_prefix(self.slot_prompts[i], prompt))
+            shared = _shared_prefix(self.slot_prompts[slot], prompt)
+            self.slot_prompts[slot] = prompt
+            self.stats["cached_chars"] += shared
+        return self.first_token_latency * (1 - shared / len(prompt))
+
+
+def _shared_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def simulated_tokens(prompt, count):
+    """Deterministic per prompt, so repeated prompts give repeated replies."""
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    return [rng.choice(FILLER) for _ in range(count)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    config = None # Set per server class
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    # --- helpers ---
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _json(self, data, status=200):
+        raw = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _chunk(self, raw):
+        self.wfile.write(f"{len(raw):X}\r\n".encode("ascii") + raw + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _admit(self):
+        fate = self.config.roll()
+        if fate == "drop":
+            self.close_connection = True
+            return False
+        if fate == "fail":
+            self._json({"error": "simulated failure"}, self.config.failure_status)
+            return False
+        return True
+
+    def _generate(self, prompt, limit, emit, first_token_latency=None):
+        """Sleeps like a real server and calls emit(token_text) per token."""
+        count = max(1, min(limit or self.config.reply_tokens, self.config.reply_tokens))
+        if first_token_latency is None:
+            first_token_latency = self.config.first_token_latency
+        time.sleep(first_token_latency)
+        delay = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+        for i, token in enumerate(simulated_tokens(prompt, count)):
+            if delay:
+                time.sleep(delay)
+            emit(token if i == 0 else " " + token)
+        with self.config.lock:
+            self.config.stats["tokens"] += count
+        return count
+
+    # --- routes ---
+    def do_GET(self):
+        if self.path == "/health":
+            return self._json({"status": "ok"})
+        if self.path == "/api/tags":
+            return self._json({"models": [{"name": self.config.model}]})
+        if self.path == "/props":
+            return self._json({"total_slots": len(self.config.slot_prompts)})
+        if self.path == "/stats":
+            return self._json(self.config.stats)
+        self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == "/tokenize":
+            return self._json({"tokens": list(range(len(body.get("content", "").split())))})
+        try:
+            if self.path == "/completion":
+                return self._llama_completion(body)
+            if self.path == "/api/chat":
+                return self._ollama_chat(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client hung up mid-stream (cancelled generation), like a real server sees it
+            with self.config.lock:
+                self.config.stats["cancelled"] += 1
+            self.close_connection = True
+            return
+        self._json({"error": "not found"}, 404)
+
+    def _llama_completion(self, body):
+        slot = body.get("id_slot", -1)
+        if slot >= len(self.config.slot_prompts):
+            return self._json({"error": f"invalid slot {slot}"}, 400)
+        if not self._admit():
+            return
+        prompt = body.get("prompt", "")
+        ttft = self.config.prompt_latency(prompt, slot, body.get("cache_prompt", False))
+        started = time.time()
+        if body.get("stream"):
+            self._start_stream("text/event-stream")
+            self._generate(prompt, body.get("n_predict"),
+                           lambda t: self._chunk(f"data: {json.dumps({'content': t, 'stop': False})}\n\n".encode()),
+                           ttft)
+            self._chunk(f"data: {json.dumps({'content': '', 'stop': True})}\n\n".encode())
+            return self._end_stream()
+
+        parts = []
+        count = self._generate(prompt, body.get("n_predict"), parts.append, ttft)
+        self._json({
+            "content": "".join(parts),
+            "stop": True,
+            "tokens_predicted": count,
+            "timings": {"predicted_ms": (time.time() - started) * 1000},
+        })
+
+    def _ollama_chat(self, body):
+        if not self._admit():
+            return
+        messages = body.get("messages", [])
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        limit = (body.get("options") or {}).get("num_predict")
+        model = body.get("model", self.config.model)
+
+        if body.get("stream", True):
+            self._start_stream("application/x-ndjson")
+            emit = lambda t: self._chunk((json.dumps({
+                "model": model, "message": {"role": "assistant", "content": t}, "done": False
+            }) + "\n").encode())
+            self._generate(prompt, limit, emit)
+            self._chunk((json.dumps({"model": model, "done": True}) + "\n").encode())
+            return self._end_stream()
+
+        parts = []
+        self._generate(prompt, limit, parts.append)
+        self._json({"model": model, "message": {"role": "assistant", "content": "".join(parts)}, "done": True})
+
+
+def start_server(config, port, host="127.0.0.1"):
+    """Starts a simulator on a daemon thread and returns the server."""
+    handler = type("SimulatorHandler", (_Handler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class FakeSearchProvider:
+    """
+    Drop-in for duckduckgo_search.DDGS: `with FakeSearchProvider() as ddgs: ddgs.text(q)`.
+    """
+
+    def __init__(self, latency=None, failure_rate=None, seed=None):
+        self.latency = SEARCH_LATENCY if latency is None else latency
+        self.failure_rate = SEARCH_FAILURE_RATE if failure_rate is None else failure_rate
+        self.random = random.Random(seed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query, max_results=3):
+        time.sleep(self.latency)
+        if self.random.random() < self.failure_rate:
+            raise RuntimeError("simulated search failure")
+        for i in range(max_results):
+            words = " ".join(simulated_tokens(f"{query}-{i}", 30))
+            yield {
+                "title": f"{query.title()} - Source {i + 1}",
+                "body": f"{query}: {words}.",
+                "href": f"https://example.invalid/{i + 1}",
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline llama.cpp / Ollama simulator")
+    parser.add_argument("--llama-port", type=int, default=8080)
+    parser.add_argument("--ollama-port", type=int, default=11434)
+    parser.add_argument("--tps", type=float, default=30.0, help="tokens per second")
+    parser.add_argument("--ttft", type=float, default=0.3, help="first-token latency (s)")
+    parser.add_argument("--tokens", type=int, default=64, help="max tokens per reply")
+    parser.add_argument("--fail", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--drop", type=float, default=0.0, help="fraction of connections dropped")
+    parser.add_argument("--slots", type=int, default=4, help="llama.cpp slots (-np)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = SimulatorConfig(args.tps, args.ttft, args.tokens, args.fail, drop_rate=args.drop, seed=args.seed,
+                             slots=args.slots)
+    start_server(config, args.llama_port)
+    start_server(config, args.ollama_port)
+    print(f"🧪 Simulator: llama.cpp on :{args.llama_port}, Ollama on :{args.ollama_port} "
+          f"({args.tps} tok/s, {args.ttft}s first token, {args.fail:.0%} failures)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"    [Stats] {config.stats}")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,10 @@ import os
 from botocore.exceptions import NoCredentialsError
 
 class StorageManager:
-    def __init__(self, bucket_name="vryndara-assets"):
+    def __init__(self, bucket_name="vryndara-assets", registry=None):
         self.bucket = bucket_name
+        # Optional ArtifactRegistry: uploads are recorded in the shared catalog
+        self.registry = registry
         # Connect to local MinIO
         self.s3 = boto3.client('s3',
             endpoint_url='http://localhost:9000',
@@ -13,7 +15,7 @@ class StorageManager:
             config=boto3.session.Config(signature_version='s3v4')
         )
 
-    def upload_file(self, file_path, object_name=None):
+    def upload_file(self, file_path, object_name=None, job_id=None, artifact_type=None):
         """Uploads ANY file type (mp4, blend, fbx) to storage."""
         if object_name is None:
             object_name = os.path.basename(file_path)
@@ -25,11 +27,23 @@ class StorageManager:
             # Generate a link (accessible by other agents)
             url = f"http://localhost:9000/{self.bucket}/{object_name}"
             print(f"    [Storage] Success: {url}")
+            self._record(file_path, url, job_id, artifact_type)
             return url
         except Exception as e:
             print(f"    [Storage] Upload Failed: {e}")
             return None
 
+    def _record(self, file_path, url, job_id, artifact_type):
+        if self.registry is None:
+            return
+        try:
+            # Already-cataloged files (renders, meshes) just gain their URL
+            if not self.registry.set_storage_url(file_path, url):
+                self.registry.register(file_path, artifact_type or "upload", job_id or "upload",
+                                       storage_url=url, source=self.bucket)
+        except Exception as e:
+            print(f"    [Storage] Registry update failed: {e}")
+
     def download_file(self, object_name, dest_path):
         """Downloads a file from storage to local disk."""
         try:
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Same path setup as the kernel and scripts: import from the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
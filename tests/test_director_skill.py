@@ -0,0 +1,31 @@
+from concurrent.futures import Future
+
+from Vryndara_Core.services.blender_pool import RenderResult
+from Vryndara_Core.services.director_skill import DirectorSkill
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.registered = []
+
+    def register(self, path, artifact_type, job_id, **kwargs):
+        self.registered.append((path, artifact_type))
+
+
+def test_superseded_preview_is_neither_cataloged_nor_kept(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry = FakeRegistry()
+    heard = []
+    director = DirectorSkill(None, on_render=lambda message, result: heard.append(message), registry=registry)
+    preview = tmp_path / "JOB_1_preview.png"
+    preview.write_bytes(b"png")
+    future = Future()
+    future.set_result(RenderResult("JOB_1_preview", "ok"))
+
+    # The final render already finished, so it is no longer active
+    director._on_render_done(future, "JOB_1_preview", str(preview), "a bridge",
+                             {"name": "preview"}, final_job="JOB_1_final")
+
+    assert registry.registered == []
+    assert not preview.exists()
+    assert heard == []
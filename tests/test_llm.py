@@ -0,0 +1,34 @@
+from sdk.python.vryndara import llm
+from sdk.python.vryndara.llm import LlamaCppBackend
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+
+    def json(self):
+        return self.body
+
+    def close(self):
+        pass
+
+
+def test_missing_slot_is_not_pinned(monkeypatch):
+    monkeypatch.setattr(llm.requests, "get", lambda url, timeout: FakeResponse(200, {"total_slots": 2}))
+    backend = LlamaCppBackend(url="http://core")
+    assert backend._payload(None, {"prompt": "hi", "id_slot": 3})["id_slot"] == -1
+    assert backend._payload(None, {"prompt": "hi", "id_slot": 1})["id_slot"] == 1
+
+
+def test_rejected_slot_retries_on_any_slot(monkeypatch):
+    sent = []
+
+    def post(url, json, timeout, stream):
+        sent.append(json["id_slot"])
+        return FakeResponse(400) if json["id_slot"] >= 0 else FakeResponse(200, {"content": "ok"})
+
+    monkeypatch.setattr(llm.requests, "post", post)
+    backend = LlamaCppBackend(url="http://core", slots=4)
+    assert backend.complete("mistral", None, {"prompt": "hi", "id_slot": 1}) == "ok"
+    assert sent == [1, -1]
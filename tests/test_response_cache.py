@@ -0,0 +1,48 @@
+import pytest
+
+from Vryndara_Core.services.response_cache import ResponseCache
+
+DIRECTOR_PROMPT = "You are the 'Director' Agent. Extract the user's intent as JSON."
+
+
+def cube_embedding(text):
+    # "red cube" and "blue cube" embed identically: the worst case for similarity matching
+    return [1.0, 0.0] if "cube" in text else [0.0, 1.0]
+
+
+def make_cache():
+    return ResponseCache(embed_fn=cube_embedding, similarity_threshold=0.97)
+
+
+def test_similar_hit_for_chat():
+    cache = make_cache()
+    cache.put("make a red cube", "Sure.")
+    assert cache.get("make a blue cube") == "Sure."
+
+
+def test_exact_only_lookups_skip_similar_entries():
+    cache = make_cache()
+    cache.put("make a red cube", '{"description": "red cube"}', DIRECTOR_PROMPT, similar=False)
+    assert cache.get("make a blue cube", DIRECTOR_PROMPT, similar=False) is None
+    assert cache.get("make a blue cube", DIRECTOR_PROMPT) is None # No vector was stored
+    assert cache.get("Make a  RED cube", DIRECTOR_PROMPT, similar=False) == '{"description": "red cube"}'
+
+
+def test_director_prompts_do_not_share_cached_answers():
+    pytest.importorskip("chromadb")
+    from sdk.python.vryndara.llm import LLMClient, FakeBackend
+    from Vryndara_Core.services.brain_service import BrainService
+
+    backend = FakeBackend(reply=lambda model, messages: f"reply {len(backend.calls)}")
+    brain = BrainService.__new__(BrainService) # No Chroma, no compaction thread
+    brain.llm = LLMClient([backend])
+    brain.response_cache = make_cache()
+    brain.store_memory = lambda text, metadata: None
+
+    red = brain.think("make a red cube", system_prompt=DIRECTOR_PROMPT, caller="director")
+    blue = brain.think("make a blue cube", system_prompt=DIRECTOR_PROMPT, caller="director")
+    assert red != blue
+    assert len(backend.calls) == 2
+    # The exact prompt is still served from cache
+    assert brain.think("make a red cube", system_prompt=DIRECTOR_PROMPT, caller="director") == red
+    assert len(backend.calls) == 2
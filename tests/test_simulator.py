@@ -0,0 +1,33 @@
+import pytest
+
+from sdk.python.vryndara.simulator import SimulatorConfig
+
+
+def test_shared_prefix_cuts_first_token_latency():
+    config = SimulatorConfig(first_token_latency=1.0, slots=2)
+    system = "You are the Director. " * 20
+
+    assert config.prompt_latency(system + "first question", 0, cache_prompt=True) == 1.0
+    assert config.prompt_latency(system + "second question", 0, cache_prompt=True) < 0.1
+    # Another slot hasn't seen the prefix; without cache_prompt nothing is reused
+    assert config.prompt_latency(system + "third question", 1, cache_prompt=True) == 1.0
+    assert config.prompt_latency(system + "fourth question", 0) == 1.0
+
+
+def test_any_slot_picks_the_longest_shared_prefix():
+    config = SimulatorConfig(first_token_latency=1.0, slots=2)
+    config.prompt_latency("alpha " * 30, 0, cache_prompt=True)
+    config.prompt_latency("beta " * 30, 1, cache_prompt=True)
+
+    assert config.prompt_latency("beta " * 30 + "more", -1, cache_prompt=True) < 0.1
+
+
+def test_search_settings_come_from_the_environment(monkeypatch):
+    from sdk.python.vryndara import simulator
+    monkeypatch.setattr(simulator, "SEARCH_LATENCY", 0.0)
+    monkeypatch.setattr(simulator, "SEARCH_FAILURE_RATE", 1.0)
+
+    with simulator.FakeSearchProvider() as ddgs:
+        assert ddgs.latency == 0.0
+        with pytest.raises(RuntimeError):
+            list(ddgs.text("bridges"))
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from Vryndara_Core.services.memory_writer import MemoryWriter
+from Vryndara_Core.services.tiered_memory import TieredMemory
+
+
+class FakeCollection:
+    """Just enough of a Chroma collection for compaction."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, documents, metadatas, ids):
+        for doc, meta, doc_id in zip(documents, metadatas, ids):
+            self.rows[doc_id] = (doc, meta)
+
+    def get(self, ids=None, where=None, include=None, limit=None, offset=0):
+        keys = [k for k in self.rows if ids is None or k in ids]
+        if where:
+            keys = [k for k in keys if all(self.rows[k][1].get(f) == v for f, v in where.items())]
+        if limit is not None:
+            keys = keys[offset:offset + limit]
+        return {"ids": keys, "documents": [self.rows[k][0] for k in keys],
+                "metadatas": [self.rows[k][1] for k in keys]}
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.rows.pop(doc_id, None)
+
+    def count(self):
+        return len(self.rows)
+
+
+class FakeChroma:
+    def __init__(self):
+        self.collections = {}
+
+    def get_or_create_collection(self, name, metadata=None):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+@pytest.fixture
+def memory():
+    writer = MemoryWriter()
+    tiers = TieredMemory(FakeChroma(), writer)
+    old = time.time() - 30 * 24 * 3600
+    for i in range(5):
+        tiers.add(f"Conversation {i} about JOB_{i}", {"type": "chat_history", "ts": old + i})
+    writer.flush()
+    yield tiers
+    writer.close()
+
+
+def test_offline_summarizer_keeps_episodes(memory):
+    episodic = memory.collections["episodic"]
+    assert memory.compact(lambda documents: None) == 0
+    assert episodic.count() == 5
+    assert memory.collections["summary"].count() == 0
+
+
+def test_summarizer_replaces_episodes(memory):
+    assert memory.compact(lambda documents: f"{len(documents)} chats") == 5
+    assert memory.collections["episodic"].count() == 0
+    assert memory.collections["summary"].count() == 1
+
+
+def test_brain_summarize_returns_none_when_core_is_offline():
+    pytest.importorskip("chromadb")
+    from Vryndara_Core.services.brain_service import BrainService
+
+    brain = BrainService.__new__(BrainService)
+    brain._complete = lambda prompt, **kwargs: None # Core unreachable
+    assert brain._summarize(["User asked about JOB_1"]) is None
@@ -0,0 +1,23 @@
+import json
+import os
+import time
+
+from Vryndara_Core.services.tts_cache import TTSCache
+
+
+def test_hits_survive_a_restart_after_flush(tmp_path):
+    cache = TTSCache(root=str(tmp_path))
+    cache.put("Hello.", "voice.onnx", b"\x00" * 10, 22050)
+    cache.put("Goodbye.", "voice.onnx", b"\x00" * 10, 22050)
+    before = cache._index[cache.key("Hello.", "voice.onnx")]["last_used"]
+    time.sleep(0.02) # Coarse clocks (Windows) would otherwise tie
+
+    assert cache.get("Hello.", "voice.onnx") is not None # Served from RAM
+    cache.flush()
+
+    with open(os.path.join(str(tmp_path), "index.json"), encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved[cache.key("Hello.", "voice.onnx")]["last_used"] > before
+    restarted = TTSCache(root=str(tmp_path))
+    oldest = min(restarted._index, key=lambda k: restarted._index[k]["last_used"])
+    assert oldest == cache.key("Goodbye.", "voice.onnx")
@@ -0,0 +1,30 @@
+import time
+from types import SimpleNamespace
+
+from gateway.workflows import WorkflowTracker
+
+STEPS = [SimpleNamespace(order=1, agent_id="researcher-1")]
+
+
+def test_idle_workflow_is_failed_as_stale():
+    tracker = WorkflowTracker(idle_timeout=60)
+    tracker.create("wf-quiet", STEPS)
+    tracker.create("wf-busy", STEPS)
+    tracker.apply("WORKFLOW_START", {"workflow_id": "wf-busy", "started": time.time()})
+    tracker.get("wf-quiet")["last_event"] -= 120
+
+    assert tracker.get("wf-quiet")["status"] == "failed"
+    assert tracker.get("wf-quiet")["error"].startswith("stale")
+    assert tracker.get("wf-busy")["status"] == "running"
+
+
+def test_stale_workflows_are_pruned_like_finished_ones():
+    tracker = WorkflowTracker(max_finished=1, idle_timeout=60)
+    for i in range(3):
+        tracker.create(f"wf-{i}", STEPS)
+        tracker._workflows[f"wf-{i}"]["last_event"] -= 120
+    tracker.create("wf-new", STEPS)
+
+    assert tracker.get("wf-0") is None and tracker.get("wf-1") is None
+    assert tracker.get("wf-2")["status"] == "failed"
+    assert tracker.get("wf-new")["status"] == "queued"
@@ -1,5 +1,8 @@
 import { useEffect, useState, useRef } from 'react';
 
+// Packed hand-position frame from the bridge (?mode=binary): uint8 type, float32 x, float32 y
+const FRAME_HAND_POSITION = 1;
+
 export const useVryndara = () => {
     // Keep the reference object alive
     const handPosRef = useRef({ x: 0.5, y: 0.5 });
@@ -7,7 +10,9 @@ export const useVryndara = () => {
     const [status, setStatus] = useState('CONNECTING');
 
     useEffect(() => {
-        const socket = new WebSocket('ws://127.0.0.1:8888/ws');
+        // Binary mode: positions arrive as 9-byte frames, discrete events stay JSON
+        const socket = new WebSocket('ws://127.0.0.1:8888/ws?mode=binary');
+        socket.binaryType = 'arraybuffer';
 
         socket.onopen = () => {
             console.log("🔗 Vryndara Bridge Connected");
@@ -15,6 +20,16 @@ export const useVryndara = () => {
         };
 
         socket.onmessage = (event) => {
+            if (event.data instanceof ArrayBuffer) {
+                const view = new DataView(event.data);
+                if (view.byteLength >= 9 && view.getUint8(0) === FRAME_HAND_POSITION) {
+                    // No JSON parsing: straight into the ref the 3D loop reads
+                    handPosRef.current.x = view.getFloat32(1, true);
+                    handPosRef.current.y = view.getFloat32(5, true);
+                }
+                return;
+            }
+
             try {
                 const signal = JSON.parse(event.data);
 